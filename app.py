@@ -1,6 +1,17 @@
 import streamlit as st
 import pandas as pd
+import numpy as np
 import plotly.graph_objects as go
+import plotly.io as pio
+
+from sip_engine import (calculate_sip_with_stepup, minimum_years, required_monthly_sip, required_step_up,
+                        sip_future_value_closed_form)
+from sip_montecarlo import sip_percentile_bands
+from sip_backtest import backtest_rolling_sip, load_index_levels, summarize_backtest
+from sip_portfolio import simulate_sip_portfolio, summarize_portfolio
+from cashflow_engine import run_cashflow_timeline, yearly_view
+from formatting import format_inr_array
+from sip_cache import sip_result_cache
 
 # Set page configuration
 st.set_page_config(
@@ -35,54 +46,6 @@ st.markdown("""
 
 
 # --- Core Functions ---
-def calculate_sip_with_stepup(monthly_investment, annual_rate, years, step_up_rate=0, inflation_rate=0):
-    """Enhanced SIP calculator with step-up and inflation adjustment"""
-    monthly_rate = annual_rate / (100 * 12)
-    total_invested = 0
-    future_value = 0
-    yearly_data = []
-    current_monthly = monthly_investment
-
-    for year in range(1, years + 1):
-        year_invested = current_monthly * 12
-        total_invested += year_invested
-
-        remaining_years = years - year + 1
-        months_remaining = remaining_years * 12
-
-        if monthly_rate > 0:
-            year_fv = current_monthly * (((1 + monthly_rate) ** 12 - 1) / monthly_rate) * (1 + monthly_rate) ** (months_remaining - 12)
-        else:
-            year_fv = current_monthly * 12 * remaining_years
-
-        future_value += year_fv
-
-        real_value = future_value / ((1 + inflation_rate/100) ** year) if inflation_rate > 0 else future_value
-
-        yearly_data.append({
-            'Year': year,
-            'Monthly SIP': current_monthly,
-            'Yearly Investment': year_invested,
-            'Cumulative Investment': total_invested,
-            'Future Value': future_value,
-            'Real Value': real_value
-        })
-
-        current_monthly = current_monthly * (1 + step_up_rate/100)
-
-    total_returns = future_value - total_invested
-    inflation_adjusted_value = future_value / ((1 + inflation_rate/100) ** years) if inflation_rate > 0 else future_value
-
-    return {
-        'total_invested': total_invested,
-        'future_value': future_value,
-        'total_returns': total_returns,
-        'inflation_adjusted_value': inflation_adjusted_value,
-        'yearly_data': yearly_data,
-        'effective_rate': ((future_value / total_invested) ** (1/years) - 1) * 100 if total_invested > 0 else 0
-    }
-
-
 def create_pie_chart(invested, returns):
     labels = ['Total Investment', 'Returns Generated']
     values = [invested, returns]
@@ -100,10 +63,39 @@ def create_pie_chart(invested, returns):
     return fig
 
 
-def create_growth_chart(yearly_data):
+def create_growth_chart(yearly_data, bands=None):
     df = pd.DataFrame(yearly_data)
     fig = go.Figure()
 
+    if bands is not None:
+        percentiles = bands['percentiles']
+        low_p, mid_p, high_p = percentiles[0], percentiles[len(percentiles) // 2], percentiles[-1]
+        low, mid, high = bands['bands'][low_p], bands['bands'][mid_p], bands['bands'][high_p]
+        low_label, mid_label, high_label = f"P{low_p}", f"P{mid_p}", f"P{high_p}"
+        fig.add_trace(go.Scatter(
+            x=bands['years'],
+            y=high,
+            mode='lines',
+            name=high_label,
+            line=dict(color='rgba(31, 119, 180, 0.3)', width=0)
+        ))
+        fig.add_trace(go.Scatter(
+            x=bands['years'],
+            y=low,
+            mode='lines',
+            name=f"{low_label}–{high_label} band",
+            fill='tonexty',
+            fillcolor='rgba(31, 119, 180, 0.2)',
+            line=dict(color='rgba(31, 119, 180, 0.3)', width=0)
+        ))
+        fig.add_trace(go.Scatter(
+            x=bands['years'],
+            y=mid,
+            mode='lines',
+            name=f"{mid_label} (median)",
+            line=dict(color='purple', width=2, dash='dot')
+        ))
+
     fig.add_trace(go.Scatter(
         x=df['Year'],
         y=df['Cumulative Investment'],
@@ -139,6 +131,56 @@ def create_growth_chart(yearly_data):
     return fig
 
 
+def build_sip_outputs(monthly_investment, annual_rate, years, step_up_rate, inflation_rate):
+    """SIP result with its pie and growth figures (as Plotly JSON) and the formatted year-wise table"""
+    result = calculate_sip_with_stepup(monthly_investment, annual_rate, years, step_up_rate, inflation_rate)
+
+    df_display = pd.DataFrame(result['yearly_data'])
+    for col in ['Monthly SIP', 'Yearly Investment', 'Cumulative Investment', 'Future Value', 'Real Value']:
+        df_display[col] = format_inr_array(df_display[col].to_numpy())
+
+    return {
+        'result': result,
+        'pie_json': create_pie_chart(result['total_invested'], result['total_returns']).to_json(),
+        'growth_json': create_growth_chart(result['yearly_data']).to_json(),
+        'table': df_display,
+    }
+
+
+@st.cache_data(show_spinner=False)
+def compute_sensitivity(monthly_investment, years, inflation_rate, rates, step_ups):
+    """Final and real corpus over a rate x step-up grid, in one broadcast of the closed form"""
+    result = sip_future_value_closed_form(monthly_investment, np.asarray(rates)[:, None], years,
+                                          np.asarray(step_ups)[None, :], inflation_rate)
+    return result['future_value'], result['inflation_adjusted_value']
+
+
+def create_sensitivity_heatmap(rates, step_ups, values, title, annual_rate, step_up_rate):
+    fig = go.Figure(data=go.Heatmap(
+        x=step_ups,
+        y=rates,
+        z=values,
+        colorscale='Blues',
+        colorbar=dict(title="₹"),
+        hovertemplate="Step-up %{x}%<br>Return %{y}%<br>₹%{z:,.0f}<extra></extra>"
+    ))
+    fig.add_trace(go.Scatter(
+        x=[step_up_rate],
+        y=[annual_rate],
+        mode='markers',
+        name='Current plan',
+        marker=dict(color='red', size=12, symbol='x')
+    ))
+    fig.update_layout(
+        title=title,
+        title_x=0.5,
+        xaxis_title="Annual Step-up Rate (%)",
+        yaxis_title="Expected Annual Return (%)",
+        height=450
+    )
+    return fig
+
+
 # --- Main App ---
 def main():
     st.markdown('<h1 class="main-header">📈 Advanced SIP Calculator</h1>', unsafe_allow_html=True)
@@ -152,8 +194,49 @@ def main():
         step_up_rate = st.slider("Annual Step-up Rate (%)", min_value=0.0, max_value=15.0, value=5.0, step=0.5)
         inflation_rate = st.slider("Expected Inflation Rate (%)", min_value=0.0, max_value=10.0, value=6.0, step=0.5)
 
+        st.markdown("## 🎯 Goal Planner")
+        target_corpus = st.number_input("Target Corpus (₹, 0 to skip)", min_value=0, value=0, step=100000)
+        target_is_real = st.checkbox("Target is in today's money", value=False)
+
+        st.markdown("## 🎲 Return Model")
+        return_model = st.radio("Returns", ["Fixed Rate", "Monte Carlo"], horizontal=True)
+        if return_model == "Monte Carlo":
+            volatility = st.slider("Annual Volatility (%)", min_value=1.0, max_value=40.0, value=15.0, step=0.5)
+            n_paths = st.select_slider("Simulated Paths", options=[10000, 25000, 50000, 100000], value=10000)
+            seed = st.number_input("Random Seed", min_value=0, value=42, step=1)
+
+        st.markdown("## 💸 Lumpsum & Withdrawals")
+        lumpsum = st.number_input("Initial Lumpsum (₹)", min_value=0, value=0, step=10000)
+        swp_amount = st.number_input("Monthly Withdrawal after SIP (₹)", min_value=0, value=0, step=1000)
+        swp_years = st.number_input("Withdrawal Duration (Years)", min_value=1, max_value=40, value=20, step=1,
+                                    disabled=swp_amount == 0)
+
+        st.markdown("## 🧺 Multi-fund Portfolio")
+        portfolio_mode = st.checkbox("Split the SIP across funds", value=False)
+        if portfolio_mode:
+            funds = st.data_editor(pd.DataFrame({
+                'Fund': ['Equity', 'Debt', 'Gold'],
+                'Weight (%)': [60.0, 30.0, 10.0],
+                'Return (%)': [12.0, 7.0, 8.0],
+                'Volatility (%)': [18.0, 4.0, 15.0],
+            }), num_rows="dynamic", hide_index=True)
+            # An equicorrelation matrix of N funds is only valid above -1/(N-1)
+            n_listed = max(len(funds.dropna()), 2)
+            min_correlation = round(np.floor(-20 / (n_listed - 1)) / 20 + 0.05, 2)
+            correlation = st.slider("Pairwise Correlation", min_value=float(min_correlation),
+                                    max_value=0.95, value=0.2, step=0.05)
+            rebalance = st.radio("Rebalancing", ["annual", "threshold", "none"], horizontal=True)
+            drift_threshold = st.slider("Drift Threshold (%)", min_value=1.0, max_value=20.0, value=5.0, step=1.0,
+                                        disabled=rebalance != "threshold")
+
+        st.markdown("## 📜 Historical Backtest")
+        index_file = st.file_uploader("Monthly index levels (CSV/Parquet)", type=["csv", "parquet"])
+
     if st.button("🧮 Calculate SIP", type="primary"):
-        result = calculate_sip_with_stepup(monthly_investment, annual_rate, years, step_up_rate, inflation_rate)
+        sip_params = dict(monthly_investment=monthly_investment, annual_rate=annual_rate, years=years,
+                          step_up_rate=step_up_rate, inflation_rate=inflation_rate)
+        outputs = sip_result_cache.get_or_compute(sip_params, lambda: build_sip_outputs(**sip_params))
+        result = outputs['result']
 
         st.markdown('<h2 class="sub-header">📈 Investment Results</h2>', unsafe_allow_html=True)
 
@@ -165,7 +248,7 @@ def main():
                       delta=f"+{((result['future_value']/result['total_invested'])*100-100):.1f}%")
         with col3:
             st.metric("📈 Total Returns", f"₹{result['total_returns']:,.0f}",
-                      delta=f"{result['effective_rate']:.1f}% annually")
+                      delta=f"{result['xirr']:.1f}% XIRR")
         with col4:
             st.metric("💵 Real Value", f"₹{result['inflation_adjusted_value']:,.0f}",
                       delta=f"After {inflation_rate}% inflation")
@@ -174,7 +257,7 @@ def main():
         col1, col2 = st.columns(2)
 
         with col1:
-            pie_fig = create_pie_chart(result['total_invested'], result['total_returns'])
+            pie_fig = pio.from_json(outputs['pie_json'])
             st.plotly_chart(pie_fig, use_container_width=True)
 
         with col2:
@@ -183,18 +266,149 @@ def main():
             - **Monthly Investment:** ₹{monthly_investment:,.0f}
             - **Investment Period:** {years} years
             - **Growth Multiple:** {result['future_value']/result['total_invested']:.1f}x
-            - **Effective Return:** {result['effective_rate']:.1f}% p.a.
+            - **XIRR (money-weighted):** {result['xirr']:.1f}% p.a.
             """)
 
-        growth_fig = create_growth_chart(result['yearly_data'])
+        if target_corpus > 0:
+            st.markdown('<h2 class="sub-header">🎯 Goal Planner</h2>', unsafe_allow_html=True)
+            needed_sip = required_monthly_sip(target_corpus, annual_rate, years, step_up_rate,
+                                              inflation_rate, real=target_is_real)
+            needed_step_up = required_step_up(target_corpus, monthly_investment, annual_rate, years,
+                                              inflation_rate, real=target_is_real)
+            needed_years = minimum_years(target_corpus, monthly_investment, annual_rate, step_up_rate,
+                                         inflation_rate, real=target_is_real)
+            goal_cols = st.columns(3)
+            with goal_cols[0]:
+                st.metric("Required Monthly SIP", f"₹{needed_sip:,.0f}",
+                          delta=f"at {step_up_rate}% step-up for {years} years", delta_color="off")
+            with goal_cols[1]:
+                st.metric("Required Step-up", f"{needed_step_up:.1f}%" if pd.notna(needed_step_up) else "Not reachable",
+                          delta=f"on ₹{monthly_investment:,.0f} for {years} years", delta_color="off")
+            with goal_cols[2]:
+                st.metric("Minimum Duration", f"{needed_years} years" if needed_years else "Over 100 years",
+                          delta=f"on ₹{monthly_investment:,.0f} at {step_up_rate}% step-up", delta_color="off")
+
+        bands = None
+        if return_model == "Monte Carlo":
+            bands = sip_percentile_bands(monthly_investment, annual_rate, years, step_up_rate, inflation_rate,
+                                         volatility=volatility, n_paths=n_paths, seed=seed)
+            st.markdown(f"### 🎲 Simulated Outcomes ({n_paths:,} paths)")
+            band_cols = st.columns(len(bands['percentiles']))
+            for band_col, p in zip(band_cols, bands['percentiles']):
+                with band_col:
+                    st.metric(f"P{p} Corpus", f"₹{bands['bands'][p][-1]:,.0f}",
+                              delta=f"₹{bands['real_bands'][p][-1]:,.0f} real", delta_color="off")
+
+        if bands is None:
+            growth_fig = pio.from_json(outputs['growth_json'])
+        else:
+            growth_fig = create_growth_chart(result['yearly_data'], bands)
         st.plotly_chart(growth_fig, use_container_width=True)
 
+        if lumpsum > 0 or swp_amount > 0:
+            st.markdown('<h2 class="sub-header">💸 Cash-flow Timeline</h2>', unsafe_allow_html=True)
+            swp_span = swp_years if swp_amount > 0 else 0
+            timeline = run_cashflow_timeline(
+                years + swp_span, annual_rate, inflation_rate, initial_balance=lumpsum,
+                sips=[{'amount': monthly_investment, 'end': years * 12, 'step_up_rate': step_up_rate}],
+                swps=[{'amount': swp_amount, 'start': years * 12 + 1, 'step_up_rate': inflation_rate}]
+                if swp_amount > 0 else [])
+            cf_cols = st.columns(3)
+            with cf_cols[0]:
+                st.metric("Corpus at End of SIP", f"₹{timeline['Future Value'].iat[years * 12 - 1]:,.0f}")
+            with cf_cols[1]:
+                st.metric("Total Withdrawn", f"₹{timeline['Withdrawals'].sum():,.0f}",
+                          delta=f"inflation-indexed at {inflation_rate}%", delta_color="off")
+            with cf_cols[2]:
+                short_months = int((timeline['Shortfall'] > 0).sum())
+                st.metric("Final Balance", f"₹{timeline['Future Value'].iat[-1]:,.0f}",
+                          delta=f"{short_months} months short" if short_months else "No shortfall",
+                          delta_color="inverse" if short_months else "off")
+            st.plotly_chart(create_growth_chart(yearly_view(timeline)), use_container_width=True)
+
+        if portfolio_mode:
+            st.markdown('<h2 class="sub-header">🧺 Portfolio Breakdown</h2>', unsafe_allow_html=True)
+            funds = funds.dropna()
+            n_funds = len(funds)
+            fund_correlation = np.full((n_funds, n_funds), correlation)
+            np.fill_diagonal(fund_correlation, 1.0)
+            try:
+                portfolio = simulate_sip_portfolio(
+                    monthly_investment, years, funds['Weight (%)'], funds['Return (%)'], funds['Volatility (%)'],
+                    fund_correlation, step_up_rate, rebalance, drift_threshold,
+                    n_paths=n_paths if return_model == "Monte Carlo" else None,
+                    seed=seed if return_model == "Monte Carlo" else None)
+            except ValueError as e:
+                st.error(f"Cannot simulate this portfolio: {e}")
+                st.stop()
+            final_corpus = portfolio['corpus'][:, -1]
+            pf_percentiles = [10, 50, 90] if return_model == "Monte Carlo" else [50]
+            pf_cols = st.columns(3)
+            for pf_col, p in zip(pf_cols, pf_percentiles):
+                with pf_col:
+                    label = f"P{p} Portfolio Corpus" if len(pf_percentiles) > 1 else "Portfolio Corpus"
+                    st.metric(label, f"₹{np.percentile(final_corpus, p):,.0f}",
+                              delta=f"{portfolio['rebalances'].mean():.1f} rebalances", delta_color="off")
+            summary = summarize_portfolio(portfolio, funds['Fund'])
+            pf_fig = go.Figure(go.Bar(x=summary['Fund'], y=summary['Gains'], marker_color='#66b3ff'))
+            pf_fig.update_layout(
+                title="Gains Contributed by Each Fund",
+                title_x=0.5,
+                yaxis_title="Amount (₹)",
+                height=400
+            )
+            col1, col2 = st.columns(2)
+            with col1:
+                st.plotly_chart(pf_fig, use_container_width=True)
+            with col2:
+                st.dataframe(summary, hide_index=True, use_container_width=True)
+
+        if index_file is not None:
+            st.markdown('<h2 class="sub-header">📜 Historical Backtest</h2>', unsafe_allow_html=True)
+            levels = load_index_levels(index_file)
+            if len(levels) <= years * 12:
+                st.warning(f"The index file covers {len(levels)} months, fewer than the {years}-year plan needs.")
+            else:
+                windows = backtest_rolling_sip(levels, monthly_investment, years, step_up_rate)
+                summary = summarize_backtest(windows)
+                st.markdown(f"Every start month from {windows['Start'].iat[0]:%b %Y} to "
+                            f"{windows['Start'].iat[-1]:%b %Y} ({len(windows)} windows).")
+                bt_cols = st.columns(3)
+                for bt_col, label in zip(bt_cols, ['P10', 'P50', 'P90']):
+                    with bt_col:
+                        st.metric(f"{label} XIRR", f"{summary.at[label, 'XIRR']:.1f}%",
+                                  delta=f"₹{summary.at[label, 'Final Corpus']:,.0f} corpus", delta_color="off")
+
+                bt_fig = go.Figure(go.Histogram(x=windows['XIRR'], nbinsx=40, marker_color='#1f77b4'))
+                bt_fig.add_vline(x=annual_rate, line_dash='dash', line_color='red',
+                                 annotation_text=f"Assumed {annual_rate}%")
+                bt_fig.update_layout(
+                    title="Realized XIRR Across Start Months",
+                    title_x=0.5,
+                    xaxis_title="XIRR (%)",
+                    yaxis_title="Windows",
+                    height=400
+                )
+                st.plotly_chart(bt_fig, use_container_width=True)
+
+        st.markdown('<h2 class="sub-header">🌡️ Sensitivity</h2>', unsafe_allow_html=True)
+        rates = tuple(np.arange(5.0, 20.01, 0.5))
+        step_ups = tuple(np.arange(0.0, 15.01, 0.5))
+        fv_grid, real_grid = compute_sensitivity(monthly_investment, years, inflation_rate, rates, step_ups)
+        col1, col2 = st.columns(2)
+        with col1:
+            st.plotly_chart(create_sensitivity_heatmap(rates, step_ups, fv_grid, "Final Corpus",
+                                                       annual_rate, step_up_rate), use_container_width=True)
+        with col2:
+            st.plotly_chart(create_sensitivity_heatmap(rates, step_ups, real_grid, "Real Value",
+                                                       annual_rate, step_up_rate), use_container_width=True)
+
         st.markdown('<h2 class="sub-header">📋 Year-wise Breakdown</h2>', unsafe_allow_html=True)
-        df = pd.DataFrame(result['yearly_data'])
-        df_display = df.copy()
-        for col in ['Monthly SIP', 'Yearly Investment', 'Cumulative Investment', 'Future Value', 'Real Value']:
-            df_display[col] = df_display[col].apply(lambda x: f"₹{x:,.0f}")
-        st.dataframe(df_display, use_container_width=True)
+        st.dataframe(outputs['table'], use_container_width=True)
+
+    cache_stats = sip_result_cache.stats()
+    st.sidebar.caption(f"Result cache: {cache_stats['hits'] + cache_stats['disk_hits']} hits, "
+                       f"{cache_stats['misses']} misses ({cache_stats['hit_rate']:.0%} hit rate)")
 
 
 if __name__ == "__main__":
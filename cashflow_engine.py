@@ -0,0 +1,121 @@
+import numpy as np
+import pandas as pd
+
+
+# --- Event schedules ---
+def _month_slice(event, n_months):
+    """Zero-based slice for an event's 1-based, inclusive start/end months"""
+    start = max(int(event.get('start', 1)), 1) - 1
+    end = event.get('end')
+    end = n_months if end is None else min(int(end), n_months)
+    return slice(start, max(end, start))
+
+
+def _stepped_amounts(event, n_months):
+    """Monthly amounts of a recurring event, stepped up every `step_up_every` months from its start"""
+    amounts = np.zeros(n_months)
+    window = _month_slice(event, n_months)
+    elapsed = np.arange(window.stop - window.start)
+    step_ups = elapsed // int(event.get('step_up_every', 12))
+    amounts[window] = event['amount'] * (1 + event.get('step_up_rate', 0) / 100) ** step_ups
+    return amounts
+
+
+# --- Timeline ---
+def run_cashflow_timeline(years, annual_rate, inflation_rate=0, initial_balance=0,
+                          lumpsums=(), sips=(), pauses=(), swps=()):
+    """Month-by-month balance for any mix of lumpsums, step-up SIPs, pauses and SWPs.
+
+    Events are dicts with 1-based, inclusive months:
+      lumpsums: {'month', 'amount'}
+      sips:     {'amount', 'start', 'end', 'step_up_rate', 'step_up_every'}
+      pauses:   {'start', 'end'} - no SIP instalments in these months
+      swps:     {'amount', 'start', 'end', 'step_up_rate', 'step_up_every'}
+    Each month the balance grows, then deposits land and withdrawals are
+    paid, capped at the balance available. Every event is written into
+    preallocated monthly arrays and the balance is a discounted running sum,
+    so the cost does not depend on the number of events.
+
+    Returns one row per month.
+    """
+    n_months = int(years) * 12
+    monthly_rate = annual_rate / (100 * 12)
+
+    deposits = np.zeros(n_months)
+    for event in lumpsums:
+        month = int(event['month'])
+        if 1 <= month <= n_months:
+            deposits[month - 1] += event['amount']
+
+    sip_amounts = np.zeros(n_months)
+    for event in sips:
+        sip_amounts += _stepped_amounts(event, n_months)
+    for event in pauses:
+        sip_amounts[_month_slice(event, n_months)] = 0
+    deposits += sip_amounts
+
+    requested = np.zeros(n_months)
+    for event in swps:
+        requested += _stepped_amounts(event, n_months)
+
+    balance, withdrawals = _run_balance(initial_balance, monthly_rate, deposits, requested)
+
+    month = np.arange(1, n_months + 1)
+    deflator = (1 + inflation_rate / 100) ** (month / 12) if inflation_rate > 0 else 1.0
+    return pd.DataFrame({
+        'Month': month,
+        'Year': (month - 1) // 12 + 1,
+        'SIP': sip_amounts,
+        'Deposits': deposits,
+        'Withdrawals': withdrawals,
+        'Shortfall': requested - withdrawals,
+        'Cumulative Investment': initial_balance + np.cumsum(deposits),
+        'Cumulative Withdrawals': np.cumsum(withdrawals),
+        'Future Value': balance,
+        'Real Value': balance / deflator,
+    })
+
+
+def _run_balance(initial_balance, monthly_rate, deposits, requested):
+    """Balances and paid withdrawals, resolving each depletion in one vectorized pass.
+
+    Without the cap, B_t = g**t * (B_0 + sum_{u<=t} net_u / g**u). Whenever
+    that goes negative, the withdrawal in that month is cut to what is
+    available, the balance is pinned at zero and the rest of the timeline is
+    recomputed from there; there is one pass per depletion, not per month.
+    """
+    n_months = len(deposits)
+    growth = (1 + monthly_rate) ** np.arange(1, n_months + 1)
+    balance = np.empty(n_months)
+    withdrawals = requested.copy()
+
+    start, opening = 0, float(initial_balance)
+    while start < n_months:
+        g = growth[start:] / (growth[start - 1] if start else 1.0)
+        segment = g * (opening + np.cumsum((deposits[start:] - withdrawals[start:]) / g))
+        short = np.flatnonzero(segment < 0)
+        if not short.size:
+            balance[start:] = segment
+            break
+
+        depleted = start + short[0]
+        balance[start:depleted] = segment[:short[0]]
+        withdrawals[depleted] += segment[short[0]]
+        balance[depleted] = 0.0
+        start, opening = depleted + 1, 0.0
+
+    return balance, withdrawals
+
+
+def yearly_view(timeline):
+    """Year-end rows of a timeline, in the column layout of calculate_sip_with_stepup's yearly_data"""
+    grouped = timeline.groupby('Year')
+    return pd.DataFrame({
+        'Year': grouped['Year'].last(),
+        'Monthly SIP': grouped['SIP'].last(),
+        'Yearly Investment': grouped['Deposits'].sum(),
+        'Yearly Withdrawals': grouped['Withdrawals'].sum(),
+        'Cumulative Investment': grouped['Cumulative Investment'].last(),
+        'Future Value': grouped['Future Value'].last(),
+        'Real Value': grouped['Real Value'].last(),
+    }).reset_index(drop=True)
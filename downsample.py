@@ -0,0 +1,43 @@
+import numpy as np
+import pandas as pd
+
+
+# --- Min/max bucket downsampling ---
+def extrema_rows(arrays, max_points):
+    """Row indices to keep per column so each line keeps its peaks and troughs.
+
+    `arrays` are rows x columns arrays of the same shape whose columns are
+    drawn together (a price and its peer average, say). Rows are split into
+    equal buckets and, for every array, each bucket's min and max row is
+    kept, plus the first and last rows. Returns a (kept rows x columns)
+    index array in time order, with at most `max_points` rows.
+    """
+    arrays = [np.asarray(a, dtype=float) for a in arrays]
+    n_rows, n_cols = arrays[0].shape
+    if n_rows <= max_points:
+        return np.broadcast_to(np.arange(n_rows)[:, None], (n_rows, n_cols))
+
+    n_buckets = max((max_points - 2) // (2 * len(arrays)), 1)
+    size = -(-n_rows // n_buckets)
+    offsets = (np.arange(n_buckets) * size)[:, None]
+
+    picks = [np.zeros((1, n_cols), dtype=int), np.full((1, n_cols), n_rows - 1)]
+    for values in arrays:
+        padded = np.full((n_buckets * size, n_cols), np.nan)
+        padded[:n_rows] = values
+        buckets = padded.reshape(n_buckets, size, n_cols)
+        # All-NaN buckets fall back to their first row, clipped to the data
+        picks.append(np.fmin(buckets, np.inf).argmin(axis=1) + offsets)
+        picks.append(np.fmax(buckets, -np.inf).argmax(axis=1) + offsets)
+    return np.sort(np.minimum(np.concatenate(picks), n_rows - 1), axis=0)
+
+
+def downsample_long(frame, max_points, var_name, value_name):
+    """Melt a dates x series frame to long format with at most `max_points` rows per series"""
+    values = frame.to_numpy(dtype=float)
+    rows = extrema_rows([values], max_points)
+    return pd.DataFrame({
+        frame.index.name or 'Date': frame.index.to_numpy()[rows].ravel(order='F'),
+        var_name: np.repeat(frame.columns.to_numpy(), len(rows)),
+        value_name: np.take_along_axis(values, rows, axis=0).ravel(order='F'),
+    })
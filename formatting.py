@@ -0,0 +1,57 @@
+import numpy as np
+
+
+# --- INR formatting ---
+# Digit groups are turned into text by table lookup, which is much faster
+# than casting integer arrays to strings
+_PLAIN = np.array([str(i) for i in range(1000)])
+_COMMA_PAIR = np.array([f',{i:02d}' for i in range(100)])
+_COMMA_TRIPLE = np.array([f',{i:03d}' for i in range(1000)])
+
+
+def format_inr_array(values, decimals=0, symbol='₹'):
+    """Format a whole array of amounts with Indian digit grouping (₹12,34,56,789).
+
+    Works group by group on the integer part (the last three digits, then
+    pairs) with NumPy string operations, so the cost is a handful of array
+    passes however many rows there are. NaN becomes an empty string.
+    """
+    values = np.asarray(values, dtype=float)
+    missing = np.isnan(values)
+    scale = 10 ** decimals
+    scaled = np.round(np.abs(np.where(missing, 0, values)) * scale).astype(np.int64)
+    whole, fraction = scaled // scale, scaled % scale
+
+    groups = [whole % 1000]
+    rest = whole // 1000
+    while rest.any():
+        groups.append(rest % 100)
+        rest //= 100
+    # Index of the most significant non-empty group in each row
+    top = np.zeros(whole.shape, dtype=int)
+    for level in range(1, len(groups)):
+        top[whole >= 1000 * 100 ** (level - 1)] = level
+
+    text = np.full(whole.shape, '')
+    for level in range(len(groups) - 1, -1, -1):
+        digits = _PLAIN[groups[level]]
+        padded = (_COMMA_TRIPLE if level == 0 else _COMMA_PAIR)[groups[level]]
+        text = np.where(level == top, digits, np.where(level < top, np.char.add(text, padded), text))
+
+    if decimals:
+        text = np.char.add(text, np.char.add('.', np.char.zfill(fraction.astype(f'U{decimals}'), decimals)))
+    # Amounts that round to zero get no sign, so -0.4 is ₹0 rather than -₹0
+    sign = np.where((values < 0) & (scaled > 0), '-' + symbol, symbol)
+    return np.where(missing, '', np.char.add(sign, text))
+
+
+def format_inr_compact(values, decimals=2, symbol='₹'):
+    """Format amounts as crore/lakh (₹1.25 Crore, ₹4.50 Lakh), falling back to full grouping below a lakh"""
+    values = np.asarray(values, dtype=float)
+    magnitude = np.abs(values)
+    crore = np.char.add(format_inr_array(magnitude / 1e7, decimals, symbol), ' Crore')
+    lakh = np.char.add(format_inr_array(magnitude / 1e5, decimals, symbol), ' Lakh')
+    text = np.where(magnitude >= 1e7, crore,
+                    np.where(magnitude >= 1e5, lakh, format_inr_array(magnitude, symbol=symbol)))
+    negative = (values < 0) & (np.round(magnitude) > 0)
+    return np.where(np.isnan(values), '', np.char.add(np.where(negative, '-', ''), text))
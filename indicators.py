@@ -0,0 +1,101 @@
+"""Technical indicators over a whole dates x tickers price frame at once.
+
+Every function takes and returns frames (or dicts of frames) aligned with
+its input, so one call covers the full universe. Moving averages are
+rolling windows and the exponential ones use pandas' compiled ewm filter,
+so no indicator loops over tickers or days in Python. Run this module to
+benchmark them on 100 tickers x 5,000 days.
+"""
+import time
+
+import numpy as np
+import pandas as pd
+
+
+# --- Moving averages ---
+def sma(prices, window=20):
+    """Simple moving average"""
+    return prices.rolling(window, min_periods=window).mean()
+
+
+def ema(prices, span=20):
+    """Exponential moving average with alpha = 2 / (span + 1), seeded at the first price"""
+    return prices.ewm(span=span, adjust=False, min_periods=span).mean()
+
+
+# --- Oscillators ---
+def rsi(prices, window=14):
+    """Relative strength index (0-100) with Wilder's smoothing"""
+    change = prices.diff()
+    smooth = lambda frame: frame.ewm(alpha=1 / window, adjust=False, min_periods=window).mean()
+    gain, loss = smooth(change.clip(lower=0)), smooth(-change.clip(upper=0))
+    return 100 - 100 / (1 + gain / loss)
+
+
+def macd(prices, fast=12, slow=26, signal=9):
+    """MACD line (fast EMA - slow EMA), its signal EMA and the histogram between them"""
+    line = ema(prices, fast) - ema(prices, slow)
+    signal_line = line.ewm(span=signal, adjust=False, min_periods=signal).mean()
+    return {'macd': line, 'signal': signal_line, 'histogram': line - signal_line}
+
+
+def zscore(prices, window=20):
+    """Distance from the rolling mean in rolling standard deviations"""
+    rolling = prices.rolling(window, min_periods=window)
+    return (prices - rolling.mean()) / rolling.std()
+
+
+# --- Volatility ---
+def bollinger_bands(prices, window=20, num_std=2.0):
+    """Middle (SMA), upper and lower bands `num_std` rolling standard deviations away"""
+    rolling = prices.rolling(window, min_periods=window)
+    middle, spread = rolling.mean(), num_std * rolling.std()
+    return {'middle': middle, 'upper': middle + spread, 'lower': middle - spread}
+
+
+def atr(close, high=None, low=None, window=14):
+    """Average true range with Wilder's smoothing.
+
+    Without `high` and `low` (the dashboard only keeps closes) the true
+    range reduces to the absolute close-to-close change.
+    """
+    previous = close.shift()
+    if high is None or low is None:
+        true_range = (close - previous).abs()
+    else:
+        true_range = np.maximum(high - low, np.maximum((high - previous).abs(), (low - previous).abs()))
+    return true_range.ewm(alpha=1 / window, adjust=False, min_periods=window).mean()
+
+
+# --- Benchmark ---
+def _benchmark(n_days=5000, n_tickers=100, repeats=5):
+    rng = np.random.default_rng(0)
+    prices = pd.DataFrame(
+        100 * np.exp(np.cumsum(rng.normal(0.0003, 0.02, (n_days, n_tickers)), axis=0)),
+        index=pd.bdate_range('2006-01-02', periods=n_days),
+        columns=[f"T{i:03d}" for i in range(n_tickers)],
+    )
+    cases = {
+        'SMA 50': lambda: sma(prices, 50),
+        'EMA 20': lambda: ema(prices, 20),
+        'RSI 14': lambda: rsi(prices),
+        'MACD 12/26/9': lambda: macd(prices),
+        'Bollinger 20': lambda: bollinger_bands(prices),
+        'ATR 14': lambda: atr(prices),
+        'Z-score 20': lambda: zscore(prices),
+    }
+    print(f"{n_tickers} tickers x {n_days:,} days, best of {repeats}")
+    total = 0.0
+    for name, case in cases.items():
+        timings = []
+        for _ in range(repeats):
+            start = time.perf_counter()
+            case()
+            timings.append(time.perf_counter() - start)
+        total += min(timings)
+        print(f"  {name:<14} {min(timings) * 1000:7.1f} ms")
+    print(f"  {'All':<14} {total * 1000:7.1f} ms")
+
+
+if __name__ == "__main__":
+    _benchmark()
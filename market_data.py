@@ -0,0 +1,380 @@
+import json
+import os
+import random
+import threading
+import time
+import zlib
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import yfinance as yf
+
+PRICE_STORE_DIR = Path(os.environ.get('PRICE_STORE_DIR', Path(__file__).parent / '.price_store'))
+
+# Universe the peer dashboard offers and the universe store is built for
+STOCKS = [
+    "AAPL","ABBV","ACN","ADBE","ADP","AMD","AMGN","AMT","AMZN","APD","AVGO",
+    "AXP","BA","BK","BKNG","BMY","BRK.B","BSX","C","CAT","CI","CL","CMCSA",
+    "COST","CRM","CSCO","CVX","DE","DHR","DIS","DUK","ELV","EOG","EQR","FDX",
+    "GD","GE","GILD","GOOG","GOOGL","HD","HON","HUM","IBM","ICE","INTC","ISRG",
+    "JNJ","JPM","KO","LIN","LLY","LMT","LOW","MA","MCD","MDLZ","META","MMC",
+    "MO","MRK","MSFT","NEE","NFLX","NKE","NOW","NVDA","ORCL","PEP","PFE","PG",
+    "PLD","PM","PSA","REGN","RTX","SBUX","SCHW","SLB","SO","SPGI","T","TJX",
+    "TMO","TSLA","TXN","UNH","UNP","UPS","V","VZ","WFC","WM","WMT","XOM",
+]
+
+
+# --- Periods ---
+def period_start(period, today=None):
+    """First date covered by a yfinance-style period such as '6mo', '1y' or '20y'"""
+    today = pd.Timestamp(today or pd.Timestamp.today()).normalize()
+    if period.endswith('mo'):
+        return today - pd.DateOffset(months=int(period[:-2]))
+    if period.endswith('y'):
+        return today - pd.DateOffset(years=int(period[:-1]))
+    if period.endswith('d'):
+        return today - pd.DateOffset(days=int(period[:-1]))
+    raise ValueError(f"Unsupported period: {period}")
+
+
+def longest_period(periods):
+    """The period reaching furthest back, e.g. '20y' out of ['6mo', '20y', '1y']"""
+    return min(periods, key=period_start)
+
+
+def slice_period(frame, period, today=None):
+    """Rows of a date-indexed frame that fall within `period`, as a slice rather than a copy"""
+    return frame.loc[period_start(period, today):]
+
+
+# --- Providers ---
+class MarketDataProvider:
+    """Source of daily OHLCV history; subclasses implement history()"""
+
+    name = 'base'
+    # Errors worth retrying after a pause, such as rate limits
+    retryable_errors = ()
+
+    def history(self, ticker, start, end):
+        """Daily OHLCV for one ticker on [start, end), indexed by plain dates"""
+        raise NotImplementedError
+
+    def unadjusted(self):
+        """Provider of the same data with raw closes plus an 'Adj Close' column, where the source has both"""
+        return self
+
+
+class YFinanceProvider(MarketDataProvider):
+    """Live data from Yahoo Finance, split and dividend adjusted unless `auto_adjust` is False"""
+
+    retryable_errors = (yf.exceptions.YFRateLimitError,)
+
+    def __init__(self, auto_adjust=True):
+        self.auto_adjust = auto_adjust
+        self.name = 'yfinance' if auto_adjust else 'yfinance-raw'
+
+    def unadjusted(self):
+        return YFinanceProvider(auto_adjust=False)
+
+    def history(self, ticker, start, end):
+        history = yf.Ticker(ticker).history(start=start, end=end, auto_adjust=self.auto_adjust)
+        if history is None or history.empty:
+            return pd.DataFrame()
+        history.index = pd.DatetimeIndex(history.index).tz_localize(None).normalize()
+        history.index.name = 'Date'
+        return history
+
+
+class LocalFileProvider(MarketDataProvider):
+    """Fixtures on disk: one <TICKER>.parquet or <TICKER>.csv per ticker, first column the date"""
+
+    name = 'local'
+
+    def __init__(self, root):
+        self.root = Path(root)
+
+    def history(self, ticker, start, end):
+        name = ticker.upper().replace('/', '_')
+        parquet_path, csv_path = self.root / f"{name}.parquet", self.root / f"{name}.csv"
+        if parquet_path.exists():
+            history = pd.read_parquet(parquet_path)
+        elif csv_path.exists():
+            history = pd.read_csv(csv_path, index_col=0)
+        else:
+            return pd.DataFrame()
+        history.index = pd.to_datetime(history.index).tz_localize(None).normalize()
+        history.index.name = 'Date'
+        history = history.sort_index()
+        return history[(history.index >= pd.Timestamp(start)) & (history.index < pd.Timestamp(end))]
+
+
+class SyntheticProvider(MarketDataProvider):
+    """Deterministic random-walk prices, for offline runs and benchmarks.
+
+    Each ticker's path is seeded from its name and anchored at `origin`, so
+    any two requests agree on the prices of the days they share.
+    """
+
+    name = 'synthetic'
+
+    def __init__(self, seed=0, origin='2000-01-03', annual_drift=0.08, annual_volatility=0.25):
+        self.seed = seed
+        self.origin = pd.Timestamp(origin)
+        self.annual_drift = annual_drift
+        self.annual_volatility = annual_volatility
+
+    def history(self, ticker, start, end):
+        days = pd.bdate_range(self.origin, pd.Timestamp(end) - pd.Timedelta(days=1), name='Date')
+        if days.empty:
+            return pd.DataFrame()
+        rng = np.random.default_rng([self.seed, zlib.crc32(ticker.upper().encode())])
+        sigma = self.annual_volatility / np.sqrt(252)
+        mu = self.annual_drift / 252 - sigma ** 2 / 2
+        close = 100 * np.exp(np.cumsum(rng.normal(mu, sigma, len(days))))
+        volume = rng.integers(1_000_000, 50_000_000, len(days))
+        history = pd.DataFrame({
+            'Open': close, 'High': close, 'Low': close, 'Close': close, 'Volume': volume,
+        }, index=days)
+        return history[history.index >= pd.Timestamp(start)]
+
+
+def get_provider(name=None):
+    """Provider named by `name` or MARKET_DATA_PROVIDER: 'yfinance' (default), 'local' or 'synthetic'.
+
+    The local provider reads fixtures from MARKET_DATA_DIR.
+    """
+    name = name or os.environ.get('MARKET_DATA_PROVIDER', 'yfinance')
+    if name == 'yfinance':
+        return YFinanceProvider()
+    if name == 'local':
+        return LocalFileProvider(os.environ.get('MARKET_DATA_DIR', Path(__file__).parent / 'fixtures' / 'prices'))
+    if name == 'synthetic':
+        return SyntheticProvider(seed=int(os.environ.get('MARKET_DATA_SEED', 0)))
+    raise ValueError(f"Unknown market data provider: {name}")
+
+
+# --- Fetch scheduling ---
+def fetch_all(fetch, keys, max_workers=8, retry_on=(), max_retries=4, base_delay=1.0, max_delay=30.0):
+    """Call fetch(key) for every key on a bounded thread pool.
+
+    Errors in `retry_on` are retried with exponential backoff and full
+    jitter (a random pause of up to base_delay * 2**attempt, capped at
+    max_delay); any other error, or running out of retries, only fails that
+    key. Returns ({key: result} for the keys that succeeded, {key: status})
+    where status is 'ok' or a short reason.
+    """
+    def attempt(key):
+        for retry in range(max_retries + 1):
+            try:
+                return fetch(key), 'ok'
+            except retry_on as exc:
+                if retry == max_retries:
+                    return None, f"gave up after {max_retries + 1} attempts: {exc}"
+                time.sleep(random.uniform(0, min(max_delay, base_delay * 2 ** retry)))
+            except Exception as exc:
+                return None, f"failed: {exc}"
+
+    keys = list(dict.fromkeys(keys))
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(keys) or 1))) as pool:
+        outcomes = list(pool.map(attempt, keys))
+
+    results = {key: result for key, (result, status) in zip(keys, outcomes) if status == 'ok'}
+    return results, {key: status for key, (_, status) in zip(keys, outcomes)}
+
+
+class SingleFlight:
+    """Collapse concurrent calls for the same key into one.
+
+    The first caller for a key runs the function; callers arriving while it
+    is in flight wait for and share its result (or exception). Nothing is
+    kept once the call finishes, so this only deduplicates simultaneous
+    work and caching stays the caller's business.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._in_flight = {}
+        self._counters = {'issued': 0, 'coalesced': 0}
+
+    def do(self, key, fn):
+        with self._lock:
+            call = self._in_flight.get(key)
+            leader = call is None
+            if leader:
+                call = self._in_flight[key] = Future()
+                self._counters['issued'] += 1
+            else:
+                self._counters['coalesced'] += 1
+
+        if leader:
+            try:
+                call.set_result(fn())
+            except BaseException as exc:
+                call.set_exception(exc)
+            finally:
+                with self._lock:
+                    del self._in_flight[key]
+        return call.result()
+
+    def stats(self):
+        with self._lock:
+            return {**self._counters, 'in_flight': len(self._in_flight)}
+
+
+def fetch_key(tickers, period):
+    """Order- and case-insensitive key for a request of `tickers` over `period`"""
+    return tuple(sorted({ticker.upper() for ticker in tickers})), period
+
+
+# One per process, shared by every Streamlit session in it; PriceStore
+# coalesces each ticker's history requests through it
+price_fetches = SingleFlight()
+
+_file_locks = {}
+_file_locks_guard = threading.Lock()
+
+
+def _file_lock(path):
+    """Process-wide lock for one store file"""
+    with _file_locks_guard:
+        return _file_locks.setdefault(str(path), threading.Lock())
+
+
+# --- Price store ---
+class PriceStore:
+    """On-disk per-ticker price history that only fetches what it does not hold.
+
+    Each ticker is one Parquet file of daily OHLCV plus a JSON sidecar with
+    the date range already requested from the provider (the one chosen by
+    get_provider unless given). A request for a longer horizon fetches only
+    the missing head, and a new day fetches only the tail; everything else
+    is read from disk.
+    """
+
+    def __init__(self, provider=None, root=PRICE_STORE_DIR):
+        self.provider = provider or get_provider()
+        # Each provider gets its own directory so offline data never mixes with live data
+        self.root = Path(root) / self.provider.name
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    def _paths(self, ticker):
+        name = ticker.upper().replace('/', '_')
+        return self.root / f"{name}.parquet", self.root / f"{name}.json"
+
+    def coverage(self, ticker):
+        """(start, end) dates already covered for `ticker`, or None"""
+        _, meta_path = self._paths(ticker)
+        if not meta_path.exists():
+            return None
+        meta = json.loads(meta_path.read_text())
+        return pd.Timestamp(meta['start']), pd.Timestamp(meta['end'])
+
+    def read(self, ticker):
+        data_path, _ = self._paths(ticker)
+        if not data_path.exists():
+            return pd.DataFrame()
+        return pd.read_parquet(data_path)
+
+    def _write(self, ticker, history, start, end):
+        # Write beside the target and rename over it, so readers only ever
+        # see a complete file. Data goes first, so the recorded coverage
+        # never claims more than the data file holds
+        data_path, meta_path = self._paths(ticker)
+        suffix = f".{os.getpid()}-{threading.get_ident()}.tmp"
+        data_tmp, meta_tmp = data_path.with_name(data_path.name + suffix), meta_path.with_name(meta_path.name + suffix)
+        history.to_parquet(data_tmp)
+        os.replace(data_tmp, data_path)
+        meta_tmp.write_text(json.dumps({'start': str(start.date()), 'end': str(end.date())}))
+        os.replace(meta_tmp, meta_path)
+
+    def history(self, ticker, start, end=None):
+        """Daily history for `ticker` from `start` to `end` (default today), fetching only gaps.
+
+        Concurrent requests for the same ticker and range, from any session,
+        share one call through price_fetches, and updates to one ticker's
+        files are serialized. Only fetches that returned rows extend the recorded coverage, since
+        providers often answer errors with an empty frame. New days are
+        fetched from the last completed stored day onwards; if that day's
+        close no longer matches, the provider has re-adjusted its history
+        (after a split or dividend) and the whole range is fetched again so
+        old and new prices stay on one basis.
+        """
+        start = pd.Timestamp(start).normalize()
+        end = pd.Timestamp(end or pd.Timestamp.today()).normalize()
+        data_path, _ = self._paths(ticker)
+        return price_fetches.do((str(data_path), start, end), lambda: self._update(ticker, start, end))
+
+    def _update(self, ticker, start, end):
+        with _file_lock(self._paths(ticker)[0]):
+            return self._update_locked(ticker, start, end)
+
+    def _update_locked(self, ticker, start, end):
+        after_end = end + pd.Timedelta(days=1)
+        covered = self.coverage(ticker)
+        stored = self.read(ticker) if covered else pd.DataFrame()
+
+        if stored.empty:
+            fetched = self.provider.history(ticker, start, after_end)
+            if fetched.empty:
+                return fetched
+            stored = fetched.sort_index()
+            self._write(ticker, stored, start, end)
+            return stored.loc[start:end]
+
+        covered_start, covered_end = covered
+        new_start, new_end = covered_start, covered_end
+        pieces = [stored]
+        if start < covered_start:
+            head = self.provider.history(ticker, start, covered_start)
+            if not head.empty:
+                pieces.append(head)
+                new_start = start
+        if end > covered_end:
+            # The last stored day may hold an intraday close, so the check
+            # is on the one before it, which was complete when stored
+            anchor = stored.index[-2] if len(stored) > 1 else stored.index[-1]
+            tail = self.provider.history(ticker, anchor, after_end)
+            # Raw stores keep an Adj Close column, which is the one that moves
+            adjusted = 'Adj Close' if 'Adj Close' in stored.columns else 'Close'
+            if not tail.empty:
+                if anchor in tail.index and not np.isclose(tail[adjusted].loc[anchor], stored[adjusted].loc[anchor],
+                                                           rtol=1e-4):
+                    full = self.provider.history(ticker, min(start, covered_start), after_end)
+                    if not full.empty:
+                        stored = full.sort_index()
+                        self._write(ticker, stored, min(start, covered_start), end)
+                        return stored.loc[start:end]
+                else:
+                    pieces.append(tail)
+                    new_end = end
+
+        if len(pieces) > 1:
+            merged = pd.concat(pieces)
+            stored = merged[~merged.index.duplicated(keep='last')].sort_index()
+            self._write(ticker, stored, new_start, new_end)
+
+        return stored.loc[start:end]
+
+    def close_prices(self, tickers, period, max_workers=8):
+        """Close prices for `tickers` over a yfinance-style `period`, fetched concurrently.
+
+        Returns a dates x tickers frame, with an all-NaN column for any
+        ticker that could not be loaded, and a {ticker: status} dict from
+        fetch_all ('no data' for tickers the provider knows nothing about).
+        """
+        start = period_start(period)
+        closes, status = fetch_all(
+            lambda ticker: self.history(ticker, start).get('Close', pd.Series(dtype=float)),
+            tickers, max_workers=max_workers, retry_on=self.provider.retryable_errors,
+        )
+        for ticker, close in closes.items():
+            if close.empty:
+                status[ticker] = 'no data'
+
+        # Empty series would turn the date index into a plain object index
+        closes = {ticker: close for ticker, close in closes.items() if not close.empty}
+        data = pd.DataFrame(closes, columns=list(status))
+        data.index.name = 'Date'
+        return data, status
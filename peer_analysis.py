@@ -0,0 +1,172 @@
+import numpy as np
+import pandas as pd
+
+
+# --- Peer averages ---
+def leave_one_out_mean(frame):
+    """Mean of every other column, for each column at once (dates x tickers).
+
+    Each entry is (row sum - own value) / (row count - own count), so all N
+    peer averages cost two passes over the frame instead of N copies of it.
+    NaNs are skipped as in DataFrame.mean, and a row with no other values
+    gives NaN.
+    """
+    values = frame.to_numpy(dtype=float)
+    present = ~np.isnan(values)
+    filled = np.where(present, values, 0.0)
+    peer_sum = filled.sum(axis=1, keepdims=True) - filled
+    peer_count = present.sum(axis=1, keepdims=True) - present
+    with np.errstate(invalid='ignore', divide='ignore'):
+        peer_mean = np.where(peer_count > 0, peer_sum / peer_count, np.nan)
+    return pd.DataFrame(peer_mean, index=frame.index, columns=frame.columns)
+
+
+# --- Risk metrics ---
+TRADING_DAYS = 252
+
+
+def _drawdown(prices, peak):
+    """Fractional distance below `peak`, and trading days since the row the peak was set"""
+    drawdown = prices / peak - 1
+    rows = np.arange(len(prices), dtype=float)[:, None]
+    at_peak = np.where(prices.to_numpy() >= peak.to_numpy(), rows, np.nan)
+    last_peak = pd.DataFrame(at_peak, index=prices.index, columns=prices.columns).ffill()
+    return drawdown, rows - last_peak
+
+
+def _window_drawdowns(prices, window, block=256):
+    """Max drawdown and longest underwater run inside each trailing `window` of closes.
+
+    Both are measured from peaks inside the window only, so the duration
+    can never exceed the window. Windows are strided views over the price
+    matrix, processed `block` end dates at a time to bound memory.
+    """
+    values = prices.to_numpy(dtype=float)
+    max_drawdown = np.full(values.shape, np.nan)
+    duration = np.full(values.shape, np.nan)
+    if len(values) >= window:
+        windows = np.lib.stride_tricks.sliding_window_view(values, window, axis=0)
+        position = np.arange(window)
+        for start in range(0, len(windows), block):
+            chunk = windows[start:start + block]
+            drawdown = chunk / np.maximum.accumulate(chunk, axis=2) - 1
+            # Days since the last day at the in-window peak, at every day of the window
+            last_peak = np.maximum.accumulate(np.where(drawdown < 0, -1, position), axis=2)
+            rows = slice(start + window - 1, start + window - 1 + len(chunk))
+            max_drawdown[rows] = drawdown.min(axis=2)
+            duration[rows] = np.where(np.isnan(max_drawdown[rows]), np.nan, (position - last_peak).max(axis=2))
+
+    frame = lambda data: pd.DataFrame(data, index=prices.index, columns=prices.columns)
+    return frame(max_drawdown), frame(duration)
+
+
+def risk_metrics(prices, risk_free_rate=0.0):
+    """Annualized risk and return statistics for every column of a dates x tickers price frame.
+
+    Volatility, Sharpe and Sortino use daily simple returns scaled by 252
+    trading days; `risk_free_rate` is annual, in percent. Drawdowns are
+    from the running peak, with duration the longest run in trading days
+    spent below a previous peak. Beta is against each ticker's
+    leave-one-out peer average return.
+    """
+    returns = prices.pct_change(fill_method=None)
+    excess = returns - risk_free_rate / 100 / TRADING_DAYS
+    peer_returns = leave_one_out_mean(returns)
+
+    volatility = returns.std() * np.sqrt(TRADING_DAYS)
+    downside = np.sqrt((excess.clip(upper=0) ** 2).mean()) * np.sqrt(TRADING_DAYS)
+    drawdown, duration = _drawdown(prices, prices.cummax())
+
+    both = returns.notna() & peer_returns.notna()
+    own, peer = returns.where(both), peer_returns.where(both)
+    beta = ((own - own.mean()) * (peer - peer.mean())).mean() / peer.var(ddof=0)
+
+    return pd.DataFrame({
+        'Volatility (%)': volatility * 100,
+        'Max drawdown (%)': drawdown.min() * 100,
+        'Drawdown duration (days)': duration.max(),
+        'Sharpe': excess.mean() * TRADING_DAYS / volatility,
+        'Sortino': excess.mean() * TRADING_DAYS / downside,
+        'Beta vs peers': beta,
+    })
+
+
+def rolling_risk_metrics(prices, window, risk_free_rate=0.0):
+    """The statistics of risk_metrics over a trailing `window` of trading days, for every date.
+
+    Returns {metric name: dates x tickers frame}. Drawdowns and their
+    durations only count peaks inside the window, so the duration is at
+    most `window` - 1 days.
+    """
+    returns = prices.pct_change(fill_method=None)
+    excess = returns - risk_free_rate / 100 / TRADING_DAYS
+    peer_returns = leave_one_out_mean(returns)
+    rolling = lambda frame: frame.rolling(window, min_periods=window)
+
+    volatility = rolling(returns).std() * np.sqrt(TRADING_DAYS)
+    mean_excess = rolling(excess).mean() * TRADING_DAYS
+    downside = np.sqrt(rolling(excess.clip(upper=0) ** 2).mean()) * np.sqrt(TRADING_DAYS)
+    max_drawdown, duration = _window_drawdowns(prices, window)
+
+    own_mean, peer_mean = rolling(returns).mean(), rolling(peer_returns).mean()
+    covariance = rolling(returns * peer_returns).mean() - own_mean * peer_mean
+    peer_variance = rolling(peer_returns ** 2).mean() - peer_mean ** 2
+
+    return {
+        'Volatility (%)': volatility * 100,
+        'Max drawdown (%)': max_drawdown * 100,
+        'Drawdown duration (days)': duration,
+        'Sharpe': mean_excess / volatility,
+        'Sortino': mean_excess / downside,
+        'Beta vs peers': covariance / peer_variance,
+    }
+
+
+# --- Correlation ---
+def return_correlation(prices):
+    """Correlation matrix of daily log returns, from one masked covariance product.
+
+    Each pair uses the days on which both tickers have a return, so tickers
+    with shorter histories don't shrink everyone else's sample. Returns are
+    centred on each ticker's own mean, which with gaps makes this a close
+    approximation of pairwise-complete correlation rather than exactly it.
+    """
+    returns = np.log(prices).diff().iloc[1:].to_numpy(dtype=float)
+    present = ~np.isnan(returns)
+    weights = present.astype(float)
+    centred = np.where(present, returns - np.nanmean(returns, axis=0), 0.0)
+
+    covariance = centred.T @ centred
+    # Sum of squares of column i over the days where column j is present
+    squares = (centred ** 2).T @ weights
+    with np.errstate(invalid='ignore', divide='ignore'):
+        correlation = covariance / np.sqrt(squares * squares.T)
+    np.fill_diagonal(correlation, 1.0)
+    return pd.DataFrame(correlation, index=prices.columns, columns=prices.columns)
+
+
+def cluster_order(correlation):
+    """Tickers ordered by average-linkage hierarchical clustering on sqrt((1 - corr) / 2).
+
+    Similar tickers end up next to each other, which is what makes a
+    correlation heatmap readable. Pairs with no overlapping data count as
+    uncorrelated.
+    """
+    corr = np.nan_to_num(correlation.to_numpy(dtype=float), nan=0.0)
+    distance = np.sqrt(np.clip((1 - corr) / 2, 0, None))
+    np.fill_diagonal(distance, np.inf)
+
+    members = {i: [i] for i in range(len(distance))}
+    while len(members) > 1:
+        a, b = np.unravel_index(np.argmin(distance), distance.shape)
+        a, b = min(a, b), max(a, b)
+        size_a, size_b = len(members[a]), len(members[b])
+        # Average linkage: the merged cluster's distance to each other cluster
+        merged = (size_a * distance[a] + size_b * distance[b]) / (size_a + size_b)
+        distance[a], distance[:, a] = merged, merged
+        distance[a, a] = np.inf
+        distance[b], distance[:, b] = np.inf, np.inf
+        members[a] = members[a] + members.pop(b)
+
+    order = next(iter(members.values())) if members else []
+    return [correlation.index[i] for i in order]
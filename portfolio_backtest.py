@@ -0,0 +1,110 @@
+import numpy as np
+import pandas as pd
+
+from xirr import irr_from_times
+
+REBALANCE_MONTHS = {'none': None, 'monthly': 1, 'quarterly': 3, 'annual': 12}
+
+
+# --- Weight backtests ---
+def backtest_weights(prices, weights, rebalance='monthly', cost_bps=0.0,
+                     initial_investment=10000.0, monthly_contribution=0.0):
+    """Backtest K weight vectors over the same close prices in one batched run.
+
+    `prices` is a dates x N frame and `weights` a K x N array (rows are
+    normalized to sum to one). The initial investment is bought on the first
+    day; on the first trading day of every later month the SIP contribution
+    is invested at the target weights and, when `rebalance` ('none',
+    'monthly', 'quarterly' or 'annual') is due, the whole portfolio is
+    traded back to target. Every trade pays `cost_bps` basis points of its
+    value. Unit holdings are a K x N matrix and each month's values are one
+    prices @ holdings product, so the loop runs over months, never over
+    portfolios or days. Rows with any missing price are dropped first.
+
+    Returns equity (dates x K, money), nav (dates x K, time-weighted with
+    costs, starting at 1), the invested total per date and a per-portfolio
+    summary with CAGR (from nav), XIRR (on the actual cash flows), max
+    drawdown, annual one-way turnover and costs paid.
+    """
+    if rebalance not in REBALANCE_MONTHS:
+        raise ValueError(f"rebalance must be one of: {', '.join(REBALANCE_MONTHS)}")
+    if initial_investment + monthly_contribution <= 0:
+        raise ValueError("Need a positive initial investment or monthly contribution")
+
+    prices = prices.dropna()
+    weights = np.atleast_2d(np.asarray(weights, dtype=float))
+    if weights.shape[1] != prices.shape[1]:
+        raise ValueError(f"weights have {weights.shape[1]} columns for {prices.shape[1]} tickers")
+    weights = weights / weights.sum(axis=1, keepdims=True)
+
+    values = prices.to_numpy(dtype=float)
+    month = prices.index.year * 12 + prices.index.month
+    starts = np.flatnonzero(np.r_[True, np.diff(month) != 0])
+    ends = np.r_[starts[1:], len(values)]
+    every = REBALANCE_MONTHS[rebalance]
+    cost_rate = cost_bps / 10000
+
+    n_portfolios = len(weights)
+    units = np.zeros_like(weights)
+    equity = np.empty((len(values), n_portfolios))
+    nav = np.empty_like(equity)
+    contributions = np.full(len(starts), float(monthly_contribution))
+    contributions[0] += initial_investment
+    costs = np.zeros(n_portfolios)
+    turnover = np.zeros(n_portfolios)
+
+    for m, (start, end) in enumerate(zip(starts, ends)):
+        price = values[start]
+        held = units * price
+        value_before = held.sum(axis=1)
+        contribution = contributions[m]
+
+        if every and m and m % every == 0:
+            drifted = held / value_before[:, None]
+            turnover += np.abs(weights - drifted).sum(axis=1) / 2
+            trades = (value_before + contribution)[:, None] * weights - held
+        else:
+            trades = contribution * weights
+        cost = cost_rate * np.abs(trades).sum(axis=1)
+        costs += cost
+        # Costs come out of the new position at target weights
+        units = (held + trades - cost[:, None] * weights) / price
+
+        segment = values[start:end] @ units.T
+        equity[start:end] = segment
+        # Growth factor into this month excluding the new money, then the month's own path
+        base = segment[0] / contribution if m == 0 else \
+            nav[start - 1] * (segment[0] - contribution) / equity[start - 1]
+        nav[start:end] = base * segment / segment[0]
+
+    dates = prices.index
+    years = (dates[-1] - dates[0]).days / 365.25
+    invested = np.zeros(len(values))
+    invested[starts] = contributions
+    invested = np.cumsum(invested)
+
+    # Money-weighted return: contributions out, final equity back in
+    times = np.r_[(dates[starts] - dates[0]).days, (dates[-1] - dates[0]).days] / 365.0
+    flows = np.concatenate([np.broadcast_to(-contributions, (n_portfolios, len(starts))),
+                            equity[-1][:, None]], axis=1)
+
+    columns = pd.RangeIndex(n_portfolios, name='Portfolio')
+    return {
+        'equity': pd.DataFrame(equity, index=dates, columns=columns),
+        'nav': pd.DataFrame(nav, index=dates, columns=columns),
+        'invested': pd.Series(invested, index=dates, name='Invested'),
+        'summary': pd.DataFrame({
+            'Final value': equity[-1],
+            'Invested': invested[-1],
+            'CAGR (%)': (nav[-1] ** (1 / years) - 1) * 100 if years > 0 else np.nan,
+            'XIRR (%)': irr_from_times(times, flows),
+            'Max drawdown (%)': (nav / np.maximum.accumulate(nav, axis=0) - 1).min(axis=0) * 100,
+            'Turnover (%/yr)': turnover / years * 100 if years > 0 else np.nan,
+            'Costs': costs,
+        }, index=columns),
+    }
+
+
+def random_weights(n_portfolios, n_assets, seed=None):
+    """Long-only weight vectors drawn uniformly from the simplex, for comparing allocations"""
+    return np.random.default_rng(seed).dirichlet(np.ones(n_assets), size=n_portfolios)
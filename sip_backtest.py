@@ -0,0 +1,83 @@
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from sip_engine import sip_future_value_closed_form, sip_xirr
+
+
+# --- Index data ---
+def load_index_levels(source, column=None):
+    """Read monthly index levels (e.g. NIFTY TRI) from a local CSV or Parquet file.
+
+    `source` is a path or an uploaded file object. The first column holds the
+    dates; `column` names the level column and defaults to the last numeric
+    one. Daily data is reduced to the last level of each month.
+    """
+    name = str(getattr(source, 'name', source))
+    if Path(name).suffix.lower() in ('.parquet', '.pq'):
+        df = pd.read_parquet(source)
+        if not isinstance(df.index, pd.DatetimeIndex):
+            df = df.set_index(df.columns[0])
+    else:
+        df = pd.read_csv(source, index_col=0)
+    df.index = pd.to_datetime(df.index)
+
+    if column is None:
+        column = df.select_dtypes('number').columns[-1]
+    levels = df[column].dropna().sort_index()
+    if levels.empty:
+        raise ValueError(f"No index levels found in {name}")
+
+    monthly = levels.groupby(levels.index.to_period('M')).last()
+    monthly.index = monthly.index.to_timestamp()
+    return monthly
+
+
+# --- Rolling-window backtest ---
+def _window_units(inverse_levels, years, step_up_rate):
+    """Units bought by a 1-rupee step-up SIP started in every possible month.
+
+    With P the running sum of 1 / level, the units bought in year y of a
+    window starting at s are u**y * (P[s + 12y + 12] - P[s + 12y]), so each
+    window costs one term per year instead of one per month.
+    """
+    n_windows = len(inverse_levels) - 12 * years
+    prefix = np.concatenate([[0.0], np.cumsum(inverse_levels)])
+    start = np.arange(n_windows)[:, None]
+    block = 12 * np.arange(years)
+    yearly_units = prefix[start + block + 12] - prefix[start + block]
+    return yearly_units @ (1 + step_up_rate / 100) ** np.arange(years)
+
+
+def backtest_rolling_sip(levels, monthly_investment, years, step_up_rate=0):
+    """Evaluate the step-up SIP for every start month in the index history.
+
+    An instalment is invested at the level of its month and every window is
+    valued at the level one month after its last instalment. Returns one row
+    per start month with the invested amount, final corpus and realized XIRR.
+    """
+    years = int(years)
+    values = np.asarray(levels, dtype=float)
+    n_windows = len(values) - 12 * years
+    if n_windows <= 0:
+        raise ValueError(f"Index history is shorter than {years} years")
+
+    units = monthly_investment * _window_units(1 / values, years, step_up_rate)
+    final_corpus = units * values[12 * years:]
+    invested = sip_future_value_closed_form(monthly_investment, 0, years, step_up_rate)['total_invested']
+
+    return pd.DataFrame({
+        'Start': levels.index[:n_windows],
+        'End': levels.index[12 * years:],
+        'Total Invested': np.full(n_windows, float(invested)),
+        'Final Corpus': final_corpus,
+        'XIRR': sip_xirr(monthly_investment, years, step_up_rate, final_corpus, timing='start'),
+    })
+
+
+def summarize_backtest(windows, percentiles=(10, 25, 50, 75, 90)):
+    """Percentiles of realized XIRR and final corpus across all windows"""
+    summary = windows[['XIRR', 'Final Corpus']].quantile(np.asarray(percentiles) / 100)
+    summary.index = [f"P{p}" for p in percentiles]
+    return summary
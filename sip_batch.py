@@ -0,0 +1,167 @@
+"""Headless SIP projections for a whole client book.
+
+Streams a client CSV chunk by chunk through the vectorized SIP engine and
+writes one output row per input row to CSV or Parquet, so memory stays
+constant however large the book is:
+
+    python sip_batch.py clients.csv projections.parquet --workers 4
+
+Required columns are monthly_investment, annual_rate and years;
+step_up_rate and inflation_rate fall back to the command-line defaults.
+Any other columns (client id, name, ...) are passed through unchanged.
+"""
+import argparse
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from sip_engine import sip_future_value_closed_form, sip_xirr
+
+PARAMETER_COLUMNS = ['monthly_investment', 'annual_rate', 'years', 'step_up_rate', 'inflation_rate']
+# sip_xirr builds rows x (12 * years) cash-flow matrices, so it runs over
+# blocks of this many rows to keep memory flat at any chunk size
+XIRR_BLOCK_ROWS = 4096
+
+
+# --- Projection ---
+def project_chunk(chunk, step_up_rate=0.0, inflation_rate=0.0, with_xirr=False):
+    """Add projection columns to one chunk of client rows"""
+    missing = [c for c in PARAMETER_COLUMNS[:3] if c not in chunk.columns]
+    if missing:
+        raise ValueError(f"Input is missing required columns: {', '.join(missing)}")
+
+    params = {
+        'monthly_investment': chunk['monthly_investment'].to_numpy(dtype=float),
+        'annual_rate': chunk['annual_rate'].to_numpy(dtype=float),
+        'years': chunk['years'].to_numpy(dtype=int),
+        'step_up_rate': chunk['step_up_rate'].fillna(step_up_rate).to_numpy(dtype=float)
+        if 'step_up_rate' in chunk.columns else step_up_rate,
+        'inflation_rate': chunk['inflation_rate'].fillna(inflation_rate).to_numpy(dtype=float)
+        if 'inflation_rate' in chunk.columns else inflation_rate,
+    }
+    result = sip_future_value_closed_form(**params)
+
+    out = chunk.copy()
+    out['total_invested'] = result['total_invested']
+    out['future_value'] = result['future_value']
+    out['total_returns'] = result['total_returns']
+    out['inflation_adjusted_value'] = result['inflation_adjusted_value']
+    if with_xirr:
+        out['xirr'] = _blocked_xirr(params['monthly_investment'], params['years'],
+                                    params['step_up_rate'], result['future_value'])
+    return out
+
+
+def _blocked_xirr(monthly_investment, years, step_up_rate, future_value):
+    """sip_xirr over a chunk, XIRR_BLOCK_ROWS rows at a time"""
+    arrays = np.broadcast_arrays(monthly_investment, years, step_up_rate, future_value)
+    xirr = np.empty(len(arrays[0]))
+    for start in range(0, len(xirr), XIRR_BLOCK_ROWS):
+        block = slice(start, start + XIRR_BLOCK_ROWS)
+        xirr[block] = sip_xirr(*(a[block] for a in arrays))
+    return xirr
+
+
+# --- Streaming I/O ---
+class _ChunkWriter:
+    """Appends DataFrame chunks to a CSV or Parquet file"""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.parquet = self.path.suffix.lower() in ('.parquet', '.pq')
+        self._writer = None
+        self._first = True
+
+    def write(self, df):
+        if self.parquet:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+
+            table = pa.Table.from_pandas(df, preserve_index=False)
+            if self._writer is None:
+                # The file schema is fixed by the first chunk, where a sparse
+                # column may be all empty; those are taken to be text
+                schema = pa.schema([field.with_type(pa.string()) if pa.types.is_null(field.type) else field
+                                    for field in table.schema], metadata=table.schema.metadata)
+                self._writer = pq.ParquetWriter(self.path, schema)
+            self._writer.write_table(table.cast(self._writer.schema))
+        else:
+            df.to_csv(self.path, mode='w' if self._first else 'a', header=self._first, index=False)
+        self._first = False
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+
+
+def _input_dtypes(input_path):
+    """Column types that stay the same in every chunk.
+
+    Left to inference, a column can be int in one chunk and float (or empty)
+    in the next, which a Parquet file with one schema cannot take. Amounts
+    and rates are read as floats, years as inferred, and pass-through
+    columns as text, which also keeps ids like 00123 intact.
+    """
+    columns = pd.read_csv(input_path, nrows=0).columns
+    return {column: float if column in PARAMETER_COLUMNS else str for column in columns if column != 'years'}
+
+
+def run_batch(input_path, output_path, chunksize=100_000, workers=1, step_up_rate=0.0,
+              inflation_rate=0.0, with_xirr=False):
+    """Project every row of `input_path` into `output_path`, one chunk at a time.
+
+    With `workers` > 1 chunks are fanned out to a process pool; at most two
+    chunks per worker are in flight and results are written in input order.
+    Returns the number of rows written.
+    """
+    reader = pd.read_csv(input_path, chunksize=chunksize, dtype=_input_dtypes(input_path))
+    writer = _ChunkWriter(output_path)
+    options = dict(step_up_rate=step_up_rate, inflation_rate=inflation_rate, with_xirr=with_xirr)
+    rows = 0
+
+    try:
+        if workers <= 1:
+            for chunk in reader:
+                out = project_chunk(chunk, **options)
+                writer.write(out)
+                rows += len(out)
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                pending = deque()
+                for chunk in reader:
+                    pending.append(pool.submit(project_chunk, chunk, **options))
+                    if len(pending) >= 2 * workers:
+                        out = pending.popleft().result()
+                        writer.write(out)
+                        rows += len(out)
+                while pending:
+                    out = pending.popleft().result()
+                    writer.write(out)
+                    rows += len(out)
+    finally:
+        writer.close()
+
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run SIP projections for a client CSV without the Streamlit UI.")
+    parser.add_argument("input", help="client CSV with monthly_investment, annual_rate and years columns")
+    parser.add_argument("output", help="output .csv or .parquet path")
+    parser.add_argument("--chunksize", type=int, default=100_000, help="rows per chunk (default: 100000)")
+    parser.add_argument("--workers", type=int, default=1, help="process pool size (default: 1, no pool)")
+    parser.add_argument("--step-up-rate", type=float, default=0.0, help="default annual step-up %% for rows without one")
+    parser.add_argument("--inflation-rate", type=float, default=0.0, help="default inflation %% for rows without one")
+    parser.add_argument("--xirr", action="store_true", help="also compute the money-weighted return per row")
+    args = parser.parse_args(argv)
+
+    rows = run_batch(args.input, args.output, args.chunksize, args.workers,
+                     args.step_up_rate, args.inflation_rate, args.xirr)
+    print(f"Wrote {rows:,} projections to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
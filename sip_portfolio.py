@@ -0,0 +1,171 @@
+import numpy as np
+import pandas as pd
+
+
+# --- Multi-fund SIP ---
+def simulate_sip_portfolio(monthly_investment, years, weights, annual_returns, volatilities=None,
+                           correlation=None, step_up_rate=0, rebalance='annual', threshold=5.0,
+                           n_paths=None, seed=None, antithetic=True, chunk_size=2048):
+    """Simulate a step-up SIP split across N funds, optionally with Monte Carlo paths.
+
+    Each instalment is split by the target `weights`. `rebalance` is
+    'none', 'annual' (back to target at every plan anniversary before the
+    last, so the final weights show the last year's drift) or
+    'threshold' (any month a fund drifts more than `threshold` percentage
+    points from its target). `annual_returns` and `volatilities` are per
+    fund, in percent, with the same monthly lognormal model as
+    sip_montecarlo; `correlation` is the N x N correlation matrix shared by
+    all paths. With `n_paths` None the portfolio grows at the expected
+    returns on a single path, and with `antithetic` the second half of each
+    chunk of paths mirrors the first's shocks.
+
+    Paths are simulated `chunk_size` at a time, a year per step: all twelve
+    months of holdings come from one cumulative product and sum, and
+    threshold rebalances re-solve only the paths that breached. The run is
+    bound by drawing and exponentiating paths x funds x months normals, so
+    20 funds x 40 years x 10,000 paths takes a couple of seconds, not
+    milliseconds.
+
+    Returns year-end corpus (paths, years), final holdings and cumulative
+    gains per fund (paths, funds), total invested and rebalance counts.
+    """
+    if rebalance not in ('none', 'annual', 'threshold'):
+        raise ValueError("rebalance must be 'none', 'annual' or 'threshold'")
+
+    weights = np.asarray(weights, dtype=float)
+    weights = weights / weights.sum()
+    n_funds = len(weights)
+    n_months = int(years) * 12
+    annual_returns = np.broadcast_to(np.asarray(annual_returns, dtype=float), (n_funds,))
+    volatilities = np.zeros(n_funds) if volatilities is None else \
+        np.broadcast_to(np.asarray(volatilities, dtype=float), (n_funds,))
+    correlation = np.eye(n_funds) if correlation is None else np.asarray(correlation, dtype=float)
+
+    stochastic = n_paths is not None
+    paths = int(n_paths) if stochastic else 1
+    sigma = volatilities / 100 / np.sqrt(12)
+    mu = np.log1p(annual_returns / (100 * 12)) - sigma ** 2 / 2
+    chol = None
+    if stochastic:
+        # Correlated shocks are z @ chol.T, scaled per fund by sigma
+        try:
+            chol = np.linalg.cholesky(correlation) * sigma[:, None]
+        except np.linalg.LinAlgError:
+            raise ValueError("correlation matrix is not positive definite") from None
+
+    month = np.arange(n_months)
+    contribution = monthly_investment * (1 + step_up_rate / 100) ** (month // 12)
+    rng = np.random.default_rng(seed)
+
+    corpus = np.empty((paths, int(years)))
+    holdings = np.empty((paths, n_funds))
+    transfers = np.empty((paths, n_funds))
+    rebalances = np.empty(paths, dtype=int)
+    for start in range(0, paths, chunk_size):
+        rows = slice(start, min(start + chunk_size, paths))
+        corpus[rows], holdings[rows], transfers[rows], rebalances[rows] = _simulate_chunk(
+            rows.stop - rows.start, weights, contribution, mu, sigma, chol, rebalance,
+            threshold, rng, antithetic)
+
+    return {
+        'corpus': corpus,
+        'final_holdings': holdings,
+        # Each fund's value is its contributions, the value rebalancing moved
+        # into it and its gains
+        'fund_gains': holdings - contribution.sum() * weights - transfers,
+        'total_invested': contribution.sum(),
+        'rebalances': rebalances,
+    }
+
+
+def _simulate_chunk(paths, weights, contribution, mu, sigma, chol, rebalance, threshold, rng, antithetic):
+    """Year-end corpus, final holdings, rebalancing transfers and rebalance counts for one chunk of paths"""
+    n_funds = len(weights)
+    n_years = len(contribution) // 12
+    # Simulated paths are float32 like sip_montecarlo's growth matrix, which
+    # halves the memory traffic the simulation is bound by
+    dtype = float if chol is None else np.float32
+    weights_t = weights.astype(dtype)
+    month_of_year = np.arange(12)[:, None]
+
+    holdings = np.zeros((paths, n_funds), dtype=dtype)
+    transfers = np.zeros((paths, n_funds))
+    rebalances = np.zeros(paths, dtype=int)
+    corpus = np.empty((paths, n_years))
+    fixed_growth = np.exp(mu + sigma ** 2 / 2)
+
+    for year in range(n_years):
+        if chol is None:
+            growth = np.broadcast_to(fixed_growth, (12, paths, n_funds))
+        else:
+            chol_t = chol.T.astype(dtype)
+            if antithetic:
+                drawn = rng.standard_normal((12, (paths + 1) // 2, n_funds), dtype=dtype) @ chol_t
+                growth = np.concatenate([drawn, -drawn[:, :paths // 2]], axis=1)
+            else:
+                growth = rng.standard_normal((12, paths, n_funds), dtype=dtype) @ chol_t
+            growth += mu.astype(dtype)
+            np.exp(growth, out=growth)
+
+        # Without rebalancing, month m's holdings are
+        # cum_m * (start + sum_{k<=m} c_k * weights / cum_k), all months at once
+        # Running products and sums go row by row: each row is a contiguous
+        # paths x funds block, which is much faster than cumprod over axis 0
+        cum = growth if chol is not None else growth.copy()
+        for m in range(1, 12):
+            cum[m] *= cum[m - 1]
+        added = (contribution[year * 12:(year + 1) * 12, None, None] * weights).astype(dtype) / cum
+        for m in range(1, 12):
+            added[m] += added[m - 1]
+        path = cum * (holdings + added)
+
+        if rebalance == 'threshold':
+            # Find each path's first month over the threshold, rebalance there,
+            # re-solve its later months and repeat for the paths that breached
+            active = np.arange(paths)
+            checked = np.full(paths, -1)
+            while active.size:
+                sub = path if active.size == paths else path[:, active]
+                drift = np.abs(sub / sub.sum(axis=2, keepdims=True) - weights_t).max(axis=2)
+                breach = (drift > threshold / 100) & (month_of_year > checked[active])
+                due = breach.any(axis=0)
+                active, first = active[due], breach.argmax(axis=0)[due]
+                if not active.size:
+                    break
+
+                before = path[first, active]
+                after = before.sum(axis=1, keepdims=True) * weights_t
+                transfers[active] += after - before
+                rebalances[active] += 1
+                base = after / cum[first, active] - added[first, active]
+                later = (month_of_year > first)[:, :, None]
+                path[:, active] = np.where(later, cum[:, active] * (base + added[:, active]), path[:, active])
+                path[first, active] = after
+                checked[active] = first
+
+        holdings = path[-1]
+        # The plan ends at the last year-end, so there is nothing to rebalance for
+        if rebalance == 'annual' and year < n_years - 1:
+            target = holdings.sum(axis=1, keepdims=True) * weights_t
+            transfers += target - holdings
+            holdings = target
+            rebalances += 1
+
+        corpus[:, year] = holdings.sum(axis=1)
+
+    return corpus, holdings, transfers, rebalances
+
+
+def summarize_portfolio(result, fund_names):
+    """Per-fund average final value and gains, with each fund's share of total gains"""
+    final_value = result['final_holdings'].mean(axis=0)
+    gains = result['fund_gains'].mean(axis=0)
+    total_gains = gains.sum()
+
+    return pd.DataFrame({
+        'Fund': list(fund_names),
+        'Final Value': final_value,
+        'Gains': gains,
+        'Share of Gains (%)': gains / total_gains * 100 if total_gains else np.zeros(len(gains)),
+        'Final Weight (%)': final_value / final_value.sum() * 100,
+    })
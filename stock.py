@@ -2,10 +2,21 @@
 # Stock Peer Analysis Dashboard (Fixed Version)
 
 import streamlit as st
-import yfinance as yf
+import numpy as np
 import pandas as pd
 import altair as alt
 
+from market_data import (
+    STOCKS, PriceStore, fetch_key, longest_period, period_start, price_fetches, slice_period,
+)
+from peer_analysis import (
+    cluster_order, leave_one_out_mean, return_correlation, risk_metrics, rolling_risk_metrics,
+)
+from downsample import downsample_long, extrema_rows
+from indicators import bollinger_bands, ema, sma
+from portfolio_backtest import REBALANCE_MONTHS, backtest_weights, random_weights
+from universe_store import UniverseStore, current_version
+
 st.set_page_config(
     page_title="Stock peer analysis dashboard",
     page_icon="📈",
@@ -43,16 +54,6 @@ def set_query_stocks(stocks):
 # -----------------------------------------------------
 # Stock lists
 # -----------------------------------------------------
-STOCKS = [
-    "AAPL","ABBV","ACN","ADBE","ADP","AMD","AMGN","AMT","AMZN","APD","AVGO",
-    "AXP","BA","BK","BKNG","BMY","BRK.B","BSX","C","CAT","CI","CL","CMCSA",
-    "COST","CRM","CSCO","CVX","DE","DHR","DIS","DUK","ELV","EOG","EQR","FDX",
-    "GD","GE","GILD","GOOG","GOOGL","HD","HON","HUM","IBM","ICE","INTC","ISRG",
-    "JNJ","JPM","KO","LIN","LLY","LMT","LOW","MA","MCD","MDLZ","META","MMC",
-    "MO","MRK","MSFT","NEE","NFLX","NKE","NOW","NVDA","ORCL","PEP","PFE","PG",
-    "PLD","PM","PSA","REGN","RTX","SBUX","SCHW","SLB","SO","SPGI","T","TJX",
-    "TMO","TSLA","TXN","UNH","UNP","UPS","V","VZ","WFC","WM","WMT","XOM",
-]
 DEFAULT_STOCKS = ["AAPL", "MSFT", "GOOGL", "NVDA", "AMZN", "TSLA", "META"]
 
 # -----------------------------------------------------
@@ -89,6 +90,14 @@ with top_left_cell:
         index=2,  # default = "6 Months"
         horizontal=True,
     )
+    max_points = st.slider(
+        "Max points per line",
+        min_value=200,
+        max_value=5000,
+        value=1000,
+        step=100,
+        help="Longer series are thinned to this many points, keeping each bucket's high and low",
+    )
 
 tickers = [t.upper() for t in tickers]
 set_query_stocks(tickers)
@@ -103,23 +112,59 @@ right_cell = cols[1].container(border=True, height="stretch", vertical_alignment
 # Data loading
 # -----------------------------------------------------
 @st.cache_resource(show_spinner=False)
+def get_price_store():
+    return PriceStore()
+
+
+class PartialLoad(Exception):
+    """Raised out of load_data so that Streamlit doesn't cache a partial result"""
+
+    def __init__(self, data, status):
+        super().__init__("Some tickers could not be loaded")
+        self.data, self.status = data, status
+
+
+@st.cache_resource(show_spinner=False, ttl="1h")
 def load_data(tickers, period):
-    tickers_obj = yf.Tickers(" ".join(tickers))
-    data = tickers_obj.history(period=period)
-    if data is None or data.empty:
-        raise RuntimeError("YFinance returned no data.")
-    return data["Close"]
-
-try:
-    data = load_data(tickers, horizon_map[horizon])
-except yf.exceptions.YFRateLimitError:
-    st.warning("YFinance is rate-limiting us 😕. Try again later.")
-    load_data.clear()
+    # Served from the local price store, which only asks YFinance for
+    # dates it does not already hold. Tickers are fetched concurrently and
+    # rate limits are retried with backoff, so one bad symbol only costs
+    # its own column. Sessions asking for the same ticker at the same time
+    # share a single fetch of it.
+    data, status = get_price_store().close_prices(tickers, period)
+    if any(s != "ok" for s in status.values()):
+        raise PartialLoad(data, status)
+    return data, status
+
+
+def load_prices(tickers, period):
+    # Complete results are cached. Partial ones are used for this run only,
+    # and the next run asks again for just the missing tickers, since the
+    # others are already in the price store
+    try:
+        return load_data(*fetch_key(tickers, period))
+    except PartialLoad as partial:
+        return partial.data, partial.status
+
+# Every horizon is a slice of the longest one, so switching horizons never
+# refetches: the full history is loaded (and cached) once per ticker set
+full_data, fetch_status = load_prices(tickers, longest_period(horizon_map.values()))
+data = slice_period(full_data, horizon_map[horizon])
+
+failed = {ticker: status for ticker, status in fetch_status.items() if status != "ok"}
+if failed:
+    with top_left_cell:
+        st.warning(f"Could not load: {', '.join(failed)}. Showing the rest.")
+        with st.expander("Fetch status"):
+            st.dataframe(pd.DataFrame({"Status": fetch_status}), use_container_width=True)
+
+tickers = [ticker for ticker in tickers if ticker not in failed]
+data = data[tickers].dropna(how="all")
+if not tickers:
+    st.error("Could not load data for any of the selected stocks. Try again later.")
     st.stop()
-
-empty_columns = data.columns[data.isna().all()].tolist()
-if empty_columns:
-    st.error(f"Error loading data for: {', '.join(empty_columns)}.")
+if data.empty:
+    st.error("No prices for the selected stocks in this time horizon.")
     st.stop()
 
 # -----------------------------------------------------
@@ -152,11 +197,7 @@ with bottom_left_cell:
 # -----------------------------------------------------
 with right_cell:
     st.altair_chart(
-        alt.Chart(
-            normalized.reset_index().melt(
-                id_vars=["Date"], var_name="Stock", value_name="Normalized price"
-            )
-        )
+        alt.Chart(downsample_long(normalized, max_points, "Stock", "Normalized price"))
         .mark_line()
         .encode(
             alt.X("Date:T"),
@@ -181,52 +222,382 @@ if len(tickers) <= 1:
     st.warning("Pick 2 or more tickers to compare them")
     st.stop()
 
-NUM_COLS = 4
-cols = st.columns(NUM_COLS)
+chart_layout = st.radio(
+    "Chart layout",
+    options=["Grid", "Single chart"],
+    horizontal=True,
+    help="Single chart sends the data to the browser once and draws every ticker as a facet",
+)
 
-for i, ticker in enumerate(tickers):
-    peers = normalized.drop(columns=[ticker])
-    peer_avg = peers.mean(axis=1)
+def bollinger_overlay(prices):
+    bands = bollinger_bands(prices)
+    return {"Bollinger upper": bands["upper"], "Bollinger lower": bands["lower"]}
+
+
+OVERLAYS = {
+    "SMA 20": lambda prices: {"SMA 20": sma(prices, 20)},
+    "SMA 50": lambda prices: {"SMA 50": sma(prices, 50)},
+    "EMA 20": lambda prices: {"EMA 20": ema(prices, 20)},
+    "Bollinger bands": bollinger_overlay,
+}
+overlay_choice = st.multiselect("Overlays", options=list(OVERLAYS), placeholder="Add indicators to the charts")
 
-    # Stock vs Peer Average
-    plot_data = pd.DataFrame(
-        {"Date": normalized.index, ticker: normalized[ticker], "Peer average": peer_avg}
-    ).melt(id_vars=["Date"], var_name="Series", value_name="Price")
+# Every ticker's peer average in one dates x tickers frame, and each chosen
+# indicator computed over all tickers at once
+peer_avgs = leave_one_out_mean(normalized)
+overlays = {name: frame for choice in overlay_choice for name, frame in OVERLAYS[choice](normalized).items()}
+series_colors = ["red", "gray"] + ["steelblue", "orange", "green", "purple", "brown"][:len(overlays)]
 
-    chart = (
-        alt.Chart(plot_data)
+NUM_COLS = 4
+
+if chart_layout == "Single chart":
+    # One long-format dataset for both faceted views; the delta is computed
+    # in the browser instead of being shipped as another column
+    prices, peers = normalized[tickers].to_numpy(), peer_avgs[tickers].to_numpy()
+    rows = extrema_rows([prices, peers], max_points)
+    peer_data = pd.DataFrame({
+        "Date": normalized.index.to_numpy()[rows].ravel(order="F"),
+        "Stock": np.repeat(tickers, len(rows)),
+        "Price": np.take_along_axis(prices, rows, axis=0).ravel(order="F"),
+        "Peer average": np.take_along_axis(peers, rows, axis=0).ravel(order="F"),
+        **{
+            name: np.take_along_axis(frame[tickers].to_numpy(), rows, axis=0).ravel(order="F")
+            for name, frame in overlays.items()
+        },
+    })
+    facet = alt.Facet("Stock:N", title=None, sort=tickers)
+
+    vs_peers = (
+        alt.Chart()
+        .transform_fold(["Price", "Peer average", *overlays], as_=["Series", "Value"])
         .mark_line()
         .encode(
             alt.X("Date:T"),
-            alt.Y("Price:Q").scale(zero=False),
-            alt.Color("Series:N", scale=alt.Scale(domain=[ticker, "Peer average"], range=["red", "gray"])),
-            alt.Tooltip(["Date", "Series", "Price"]),
+            alt.Y("Value:Q", title="Price").scale(zero=False),
+            alt.Color(
+                "Series:N",
+                scale=alt.Scale(domain=["Price", "Peer average", *overlays], range=series_colors),
+            ),
+            alt.Tooltip(["Date:T", "Series:N", "Value:Q"]),
         )
-        .properties(title=f"{ticker} vs peer average", height=300)
+        .properties(width=220, height=180)
+        .facet(facet, data=peer_data, columns=NUM_COLS, title="Stock vs peer average")
+        .resolve_scale(y="independent")
+    )
+
+    minus_peers = (
+        alt.Chart()
+        .transform_calculate(Delta="datum.Price - datum['Peer average']")
+        .mark_area()
+        .encode(alt.X("Date:T"), alt.Y("Delta:Q").scale(zero=False))
+        .properties(width=220, height=180)
+        .facet(facet, data=peer_data, columns=NUM_COLS, title="Stock minus peer average")
+        .resolve_scale(y="independent")
     )
 
-    cell = cols[(i * 2) % NUM_COLS].container(border=True)
-    cell.altair_chart(chart, use_container_width=True)
+    # Both facets name the same frame, which Altair serializes only once
+    st.altair_chart(alt.vconcat(vs_peers, minus_peers))
+else:
+    cols = st.columns(NUM_COLS)
+    peer_deltas = normalized - peer_avgs
+
+    for i, ticker in enumerate(tickers):
+        peer_avg = peer_avgs[ticker]
+
+        # Stock vs Peer Average
+        plot_data = downsample_long(
+            pd.DataFrame({
+                ticker: normalized[ticker],
+                "Peer average": peer_avg,
+                **{name: frame[ticker] for name, frame in overlays.items()},
+            }),
+            max_points, "Series", "Price",
+        )
+
+        chart = (
+            alt.Chart(plot_data)
+            .mark_line()
+            .encode(
+                alt.X("Date:T"),
+                alt.Y("Price:Q").scale(zero=False),
+                alt.Color(
+                    "Series:N",
+                    scale=alt.Scale(domain=[ticker, "Peer average", *overlays], range=series_colors),
+                ),
+                alt.Tooltip(["Date", "Series", "Price"]),
+            )
+            .properties(title=f"{ticker} vs peer average", height=300)
+        )
+
+        cell = cols[(i * 2) % NUM_COLS].container(border=True)
+        cell.altair_chart(chart, use_container_width=True)
+
+        # Delta vs Peer
+        plot_data = downsample_long(peer_deltas[[ticker]], max_points, "Stock", "Delta")
+
+        chart = (
+            alt.Chart(plot_data)
+            .mark_area()
+            .encode(alt.X("Date:T"), alt.Y("Delta:Q").scale(zero=False))
+            .properties(title=f"{ticker} minus peer average", height=300)
+        )
+
+        cell = cols[(i * 2 + 1) % NUM_COLS].container(border=True)
+        cell.altair_chart(chart, use_container_width=True)
+
+# -----------------------------------------------------
+# Risk Metrics
+# -----------------------------------------------------
+"""
+## Risk metrics
+
+Annualized from daily returns over the chosen horizon. Beta is measured
+against the same leave-one-out peer average as the charts above.
+"""
+
+ROLLING_WINDOWS = (30, 90)
+
+
+@st.cache_resource(show_spinner=False, ttl="1h")
+def compute_risk_metrics(data, risk_free_rate):
+    # Whole-horizon table plus every rolling series, computed for all
+    # tickers at once and kept next to the cached prices
+    return risk_metrics(data, risk_free_rate), {
+        window: rolling_risk_metrics(data, window, risk_free_rate) for window in ROLLING_WINDOWS
+    }
+
+risk_cols = st.columns([1, 1, 2])
+risk_free_rate = risk_cols[0].number_input(
+    "Risk-free rate (%)", min_value=0.0, max_value=20.0, value=0.0, step=0.25
+)
+risk_window = risk_cols[1].radio(
+    "Window",
+    options=["Whole horizon"] + [f"Last {window} days" for window in ROLLING_WINDOWS],
+    horizontal=True,
+)
+
+whole_horizon, rolling_metrics = compute_risk_metrics(data, risk_free_rate)
 
-    # Delta vs Peer
-    plot_data = pd.DataFrame(
-        {"Date": normalized.index, "Delta": normalized[ticker] - peer_avg}
+if risk_window == "Whole horizon":
+    risk_table = whole_horizon
+else:
+    window = int(risk_window.split()[1])
+    risk_table = pd.DataFrame({name: frame.iloc[-1] for name, frame in rolling_metrics[window].items()})
+
+st.dataframe(risk_table.rename_axis("Stock").round(2), use_container_width=True)
+
+rolling_cols = st.columns([1, 1, 2])
+rolling_metric = rolling_cols[0].selectbox("Rolling metric", options=list(whole_horizon.columns))
+rolling_window = rolling_cols[1].radio(
+    "Rolling window (days)", options=list(ROLLING_WINDOWS), horizontal=True
+)
+
+st.altair_chart(
+    alt.Chart(
+        downsample_long(
+            rolling_metrics[rolling_window][rolling_metric].dropna(how="all"),
+            max_points, "Stock", rolling_metric,
+        )
+    )
+    .mark_line()
+    .encode(
+        alt.X("Date:T"),
+        alt.Y(f"{rolling_metric}:Q").scale(zero=False),
+        alt.Color("Stock:N"),
     )
+    .properties(title=f"Rolling {rolling_window}-day {rolling_metric}", height=300),
+    use_container_width=True,
+)
 
-    chart = (
-        alt.Chart(plot_data)
-        .mark_area()
-        .encode(alt.X("Date:T"), alt.Y("Delta:Q").scale(zero=False))
-        .properties(title=f"{ticker} minus peer average", height=300)
+# -----------------------------------------------------
+# Correlation
+# -----------------------------------------------------
+"""
+## Return correlation
+
+Correlation of daily log returns, with stocks ordered by hierarchical
+clustering so that groups that move together sit next to each other.
+"""
+
+CORRELATION_WINDOWS = {"Whole horizon": None, "Last 30 days": 30, "Last 90 days": 90, "Last year": 252}
+
+
+@st.cache_resource(show_spinner=False, max_entries=2)
+def open_universe_version(version):
+    return UniverseStore(version=version)
+
+
+def get_universe():
+    # Memory-mapped arrays built offline by universe_store.py, or None.
+    # CURRENT is read on every run, so a rebuild is picked up without a restart
+    version = current_version()
+    return open_universe_version(version) if version else None
+
+
+def clustered_correlation(prices, window):
+    prices = prices.dropna(axis=1, how="all")
+    if window:
+        prices = prices.iloc[-(window + 1):]
+    correlation = return_correlation(prices)
+    order = cluster_order(correlation)
+    return correlation.loc[order, order]
+
+
+@st.cache_data(show_spinner=False, ttl="1h")
+def compute_correlation(tickers, period, window, universe_version):
+    # universe_version only keys the cache, so a rebuilt store isn't served stale results.
+    # load_data raises PartialLoad straight through, so a matrix missing
+    # some tickers is never cached
+    universe = get_universe()
+    if universe is not None and set(tickers) <= set(universe.tickers):
+        # Raw closes jump on every split; returns need the adjusted series
+        prices = universe.frame("adj_close", tickers, start=period_start(period))
+    else:
+        full_data, _ = load_data(*fetch_key(tickers, longest_period(horizon_map.values())))
+        prices = slice_period(full_data, period)
+    return clustered_correlation(prices, window), []
+
+
+def load_correlation(tickers, period, window, universe_version):
+    # Partial loads are computed for this run only, like load_prices
+    try:
+        return compute_correlation(tickers, period, window, universe_version)
+    except PartialLoad as partial:
+        missing = [ticker for ticker, status in partial.status.items() if status != "ok"]
+        return clustered_correlation(slice_period(partial.data, period), window), missing
+
+corr_cols = st.columns([1, 2, 1])
+corr_scope = corr_cols[0].radio("Stocks", options=["Selected", "All stocks"], horizontal=True)
+corr_window = corr_cols[1].radio("Window", options=list(CORRELATION_WINDOWS), horizontal=True, key="corr_window")
+
+correlation, corr_missing = load_correlation(
+    fetch_key(tickers if corr_scope == "Selected" else STOCKS, None)[0],
+    horizon_map[horizon],
+    CORRELATION_WINDOWS[corr_window],
+    current_version(),
+)
+if corr_missing:
+    corr_cols[2].caption(f"Left out, could not load: {', '.join(corr_missing)}")
+order = list(correlation.index)
+corr_data = correlation.rename_axis(index="Stock", columns="Peer").stack().rename("Correlation").reset_index()
+
+st.altair_chart(
+    alt.Chart(corr_data)
+    .mark_rect()
+    .encode(
+        alt.X("Peer:N", sort=order, title=None),
+        alt.Y("Stock:N", sort=order, title=None),
+        alt.Color("Correlation:Q").scale(scheme="redblue", domain=[-1, 1], reverse=True),
+        tooltip=["Stock", "Peer", alt.Tooltip("Correlation:Q", format=".2f")],
+    )
+    .properties(height=max(300, 14 * len(order))),
+    use_container_width=True,
+)
+
+# -----------------------------------------------------
+# Portfolio Backtest
+# -----------------------------------------------------
+"""
+## Portfolio backtest
+
+What if you had held the selected stocks at fixed weights over this
+horizon? Your allocation is run together with a batch of random ones, so
+you can see where it sits among the alternatives.
+"""
+
+
+@st.cache_data(show_spinner=False, ttl="1h", max_entries=16)
+def run_backtest(data, weights, rebalance, cost_bps, initial_investment, monthly_contribution, n_random):
+    # Row 0 is the user's allocation, the rest are random for comparison.
+    # Only what the page draws is kept: the full equity and nav frames run
+    # to tens of MB per input combination
+    all_weights = np.vstack([weights, random_weights(n_random, len(weights), seed=0)])
+    backtest = backtest_weights(
+        data, all_weights, rebalance, cost_bps, initial_investment, monthly_contribution
+    )
+    curves = pd.DataFrame({"Portfolio": backtest["equity"][0], "Invested": backtest["invested"]})
+    return backtest["summary"], curves
+
+bt_cols = st.columns(4)
+bt_rebalance = bt_cols[0].selectbox("Rebalance", options=list(REBALANCE_MONTHS), index=1)
+bt_cost = bt_cols[1].number_input("Transaction cost (bps)", min_value=0.0, max_value=200.0, value=10.0, step=1.0)
+bt_initial = bt_cols[2].number_input("Initial investment ($)", min_value=0.0, value=10000.0, step=1000.0)
+bt_contribution = bt_cols[3].number_input("Monthly contribution ($)", min_value=0.0, value=0.0, step=100.0)
+
+weight_cols = st.columns([1, 2])
+with weight_cols[0]:
+    weights_table = st.data_editor(
+        pd.DataFrame({"Stock": tickers, "Weight (%)": 100 / len(tickers)}),
+        hide_index=True,
+        disabled=["Stock"],
+        use_container_width=True,
+        key=f"weights_{','.join(tickers)}",
     )
+    n_random = st.slider("Random allocations to compare", min_value=0, max_value=1000, value=200, step=50)
+
+bt_weights = weights_table["Weight (%)"].fillna(0).clip(lower=0).to_numpy(dtype=float)
+if bt_weights.sum() <= 0:
+    weight_cols[1].warning("Give at least one stock a positive weight to run the backtest")
+elif bt_initial + bt_contribution <= 0:
+    weight_cols[1].warning("Set an initial investment or a monthly contribution to run the backtest")
+elif len(data.dropna()) < 2:
+    weight_cols[1].warning("Not enough days where every selected stock has a price")
+else:
+    summary, curves = run_backtest(
+        data, tuple(bt_weights / bt_weights.sum()), bt_rebalance, bt_cost,
+        bt_initial, bt_contribution, n_random,
+    )
+    mine = summary.loc[0]
+
+    with weight_cols[1]:
+        metric_cols = st.columns(5)
+        metric_cols[0].metric("Final value", f"${mine['Final value']:,.0f}",
+                              delta=f"{mine['Final value'] - mine['Invested']:,.0f}")
+        metric_cols[1].metric("CAGR", f"{mine['CAGR (%)']:.1f}%")
+        metric_cols[2].metric("XIRR", f"{mine['XIRR (%)']:.1f}%")
+        metric_cols[3].metric("Max drawdown", f"{mine['Max drawdown (%)']:.1f}%")
+        metric_cols[4].metric("Turnover", f"{mine['Turnover (%/yr)']:.0f}%/yr")
+
+        st.altair_chart(
+            alt.Chart(downsample_long(curves, max_points, "Series", "Value ($)"))
+            .mark_line()
+            .encode(
+                alt.X("Date:T"),
+                alt.Y("Value ($):Q"),
+                alt.Color("Series:N", scale=alt.Scale(domain=["Portfolio", "Invested"], range=["red", "gray"])),
+            )
+            .properties(title="Equity curve", height=300),
+            use_container_width=True,
+        )
 
-    cell = cols[(i * 2 + 1) % NUM_COLS].container(border=True)
-    cell.altair_chart(chart, use_container_width=True)
+    if n_random:
+        st.altair_chart(
+            alt.Chart(summary.assign(Allocation=np.where(summary.index == 0, "Yours", "Random")).reset_index())
+            .mark_circle()
+            .encode(
+                alt.X("Max drawdown (%):Q").scale(zero=False),
+                alt.Y("CAGR (%):Q").scale(zero=False),
+                alt.Color("Allocation:N", scale=alt.Scale(domain=["Yours", "Random"], range=["red", "lightgray"])),
+                alt.Size("Allocation:N", scale=alt.Scale(domain=["Yours", "Random"], range=[150, 20]), legend=None),
+                alt.Order("Allocation:N", sort="descending"),
+                tooltip=["Portfolio", "CAGR (%)", "Max drawdown (%)", "Turnover (%/yr)"],
+            )
+            .properties(title="Return vs drawdown of each allocation", height=350),
+            use_container_width=True,
+        )
 
 # -----------------------------------------------------
 # Raw Data
 # -----------------------------------------------------
 """
 ## Raw data
+
+Charts above may be thinned to the point budget; the table has every day.
 """
 st.dataframe(data)
+
+fetch_stats = price_fetches.stats()
+st.caption(
+    f"Ticker loads this process: {fetch_stats['issued']} issued, "
+    f"{fetch_stats['coalesced']} shared with a concurrent request"
+)
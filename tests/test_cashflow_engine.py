@@ -0,0 +1,77 @@
+import numpy as np
+import pytest
+
+from cashflow_engine import run_cashflow_timeline, yearly_view
+from sip_engine import calculate_sip_with_stepup
+
+
+def naive_timeline(years, annual_rate, initial_balance=0, lumpsums=(), sips=(), pauses=(), swps=()):
+    """Month-by-month loop: grow, deposit, then pay what is requested up to the balance"""
+    def stepped(event, month):
+        start, end = event.get('start', 1), event.get('end') or years * 12
+        if not start <= month <= end:
+            return 0.0
+        return event['amount'] * (1 + event.get('step_up_rate', 0) / 100) ** ((month - start) // event.get('step_up_every', 12))
+
+    growth = 1 + annual_rate / 1200
+    balance, balances, withdrawals = initial_balance, [], []
+    for month in range(1, years * 12 + 1):
+        paused = any(p['start'] <= month <= p.get('end', years * 12) for p in pauses)
+        deposit = sum(e['amount'] for e in lumpsums if e['month'] == month)
+        deposit += 0.0 if paused else sum(stepped(e, month) for e in sips)
+        balance = balance * growth + deposit
+        paid = min(sum(stepped(e, month) for e in swps), balance)
+        balance -= paid
+        balances.append(balance)
+        withdrawals.append(paid)
+    return np.array(balances), np.array(withdrawals)
+
+
+def test_plain_sip_matches_calculator():
+    timeline = run_cashflow_timeline(10, 12, sips=[{'amount': 5000, 'step_up_rate': 10}])
+    expected = calculate_sip_with_stepup(5000, 12, 10, 10)
+    assert timeline['Future Value'].iloc[-1] == pytest.approx(expected['future_value'], rel=1e-12)
+    assert timeline['Cumulative Investment'].iloc[-1] == pytest.approx(expected['total_invested'])
+
+
+def test_mixed_events_match_naive_loop():
+    events = dict(
+        initial_balance=100_000,
+        lumpsums=[{'month': 1, 'amount': 50_000}, {'month': 40, 'amount': 200_000}],
+        sips=[{'amount': 5000, 'start': 1, 'end': 120, 'step_up_rate': 10},
+              {'amount': 2000, 'start': 25, 'step_up_rate': 5, 'step_up_every': 6}],
+        pauses=[{'start': 30, 'end': 35}],
+        swps=[{'amount': 8000, 'start': 121, 'step_up_rate': 6}],
+    )
+    timeline = run_cashflow_timeline(20, 10, **events)
+    balances, withdrawals = naive_timeline(20, 10, **events)
+    np.testing.assert_allclose(timeline['Future Value'], balances, rtol=1e-9, atol=1e-6)
+    np.testing.assert_allclose(timeline['Withdrawals'], withdrawals, rtol=1e-9)
+    assert (timeline['Shortfall'] == 0).all()
+
+
+def test_depletion_caps_withdrawals_and_recovers():
+    events = dict(
+        initial_balance=500_000,
+        lumpsums=[{'month': 100, 'amount': 300_000}],
+        swps=[{'amount': 20_000, 'start': 1, 'step_up_rate': 10}],
+    )
+    timeline = run_cashflow_timeline(15, 8, **events)
+    balances, withdrawals = naive_timeline(15, 8, **events)
+    np.testing.assert_allclose(timeline['Future Value'], balances, rtol=1e-9, atol=1e-6)
+    np.testing.assert_allclose(timeline['Withdrawals'], withdrawals, rtol=1e-9, atol=1e-6)
+
+    # Runs dry, is refilled by the lumpsum, then runs dry again
+    empty = np.flatnonzero(timeline['Future Value'] <= 1e-9)
+    assert empty.size and empty[0] < 99 and empty[-1] > 100
+    assert (timeline['Future Value'] >= -1e-9).all()
+    np.testing.assert_allclose(timeline['Shortfall'] + timeline['Withdrawals'],
+                               [20_000 * 1.1 ** (m // 12) for m in range(180)])
+
+
+def test_yearly_view_rows():
+    timeline = run_cashflow_timeline(5, 12, inflation_rate=6, sips=[{'amount': 1000}])
+    yearly = yearly_view(timeline)
+    assert list(yearly['Year']) == [1, 2, 3, 4, 5]
+    np.testing.assert_allclose(yearly['Yearly Investment'], 12_000)
+    assert yearly['Real Value'].iloc[-1] == pytest.approx(yearly['Future Value'].iloc[-1] / 1.06 ** 5)
@@ -0,0 +1,58 @@
+import numpy as np
+import pandas as pd
+
+from downsample import downsample_long, extrema_rows
+
+
+def test_short_series_are_kept_whole():
+    rows = extrema_rows([np.zeros((50, 3))], 100)
+    assert rows.shape == (50, 3)
+    np.testing.assert_array_equal(rows[:, 1], np.arange(50))
+
+
+def test_keeps_each_buckets_max_and_min():
+    rng = np.random.default_rng(0)
+    values = np.cumsum(rng.normal(size=(10_000, 3)), axis=0)
+    max_points = 202
+    rows = extrema_rows([values], max_points)
+
+    assert rows.shape[0] <= max_points
+    assert (np.diff(rows, axis=0) >= 0).all()
+    n_buckets = (max_points - 2) // 2
+    size = -(-len(values) // n_buckets)
+    for col in range(3):
+        kept = set(rows[:, col])
+        assert {0, len(values) - 1} <= kept
+        for start in range(0, len(values), size):
+            bucket = values[start:start + size, col]
+            assert start + bucket.argmax() in kept and start + bucket.argmin() in kept
+        # So the global extremes survive too
+        assert values[:, col].argmax() in kept and values[:, col].argmin() in kept
+
+
+def test_lines_drawn_together_keep_each_others_extremes():
+    rng = np.random.default_rng(1)
+    price, peer = rng.normal(size=(2, 5000, 1))
+    rows = extrema_rows([price, peer], 400)[:, 0]
+    assert price[:, 0].argmax() in rows and peer[:, 0].argmin() in rows
+
+
+def test_nan_buckets_stay_in_range():
+    values = np.full((1000, 2), np.nan)
+    values[:300, 0] = np.arange(300)
+    rows = extrema_rows([values], 50)
+    assert rows.max() <= 999 and rows.min() >= 0
+    assert 299 in rows[:, 0]
+
+
+def test_downsample_long_layout():
+    dates = pd.bdate_range('2000-01-03', periods=3000, name='Date')
+    frame = pd.DataFrame({'AAPL': np.sin(np.arange(3000) / 50), 'MSFT': np.cos(np.arange(3000) / 50)},
+                         index=dates)
+    long = downsample_long(frame, 300, 'Stock', 'Price')
+    assert list(long.columns) == ['Date', 'Stock', 'Price']
+    for stock, group in long.groupby('Stock'):
+        assert len(group) <= 300
+        pd.testing.assert_series_equal(group.set_index('Date')['Price'], frame[stock].loc[group['Date']],
+                                       check_names=False, check_freq=False)
+        assert group['Price'].max() == frame[stock].max() and group['Price'].min() == frame[stock].min()
@@ -0,0 +1,61 @@
+import numpy as np
+import pytest
+
+from formatting import format_inr_array, format_inr_compact
+
+
+def indian_grouping(value, decimals=0):
+    """Per-value reference: last three digits, then pairs"""
+    text = f"{abs(value):.{decimals}f}"
+    whole, _, fraction = text.partition('.')
+    head, tail = whole[:-3], whole[-3:]
+    pairs = []
+    while head:
+        pairs.insert(0, head[-2:])
+        head = head[:-2]
+    grouped = ','.join(pairs + [tail])
+    sign = '-' if value < 0 and float(text) > 0 else ''
+    return f"{sign}₹{grouped}" + (f".{fraction}" if decimals else '')
+
+
+@pytest.mark.parametrize('value, expected', [
+    (0, '₹0'),
+    (7, '₹7'),
+    (999, '₹999'),
+    (1000, '₹1,000'),
+    (99999, '₹99,999'),
+    (100000, '₹1,00,000'),
+    (12345678, '₹1,23,45,678'),
+    (123456789012, '₹1,23,45,67,89,012'),
+    (999.5, '₹1,000'),
+    (-1234567, '-₹12,34,567'),
+])
+def test_grouping(value, expected):
+    assert format_inr_array([value])[0] == expected
+
+
+def test_amounts_that_round_to_zero_have_no_sign():
+    assert list(format_inr_array([-0.4, -0.0, -0.5001])) == ['₹0', '₹0', '-₹1']
+    assert list(format_inr_array([-0.004, -0.006], decimals=2)) == ['₹0.00', '-₹0.01']
+
+
+def test_decimals_and_missing():
+    assert list(format_inr_array([1234.5, np.nan, 0.05, -1e5], decimals=2)) == \
+        ['₹1,234.50', '', '₹0.05', '-₹1,00,000.00']
+    assert format_inr_array([42], symbol='Rs ')[0] == 'Rs 42'
+
+
+def test_matches_reference_on_random_amounts():
+    # Whole paise, so no value sits on a rounding tie at two decimals
+    values = np.random.default_rng(0).integers(-10 ** 12, 10 ** 12, 2000) / 100
+    for decimals in (0, 2):
+        assert list(format_inr_array(values, decimals)) == [indian_grouping(v, decimals) for v in values]
+
+
+def test_keeps_shape():
+    assert format_inr_array(np.arange(6.0).reshape(2, 3)).shape == (2, 3)
+
+
+def test_compact_units():
+    assert list(format_inr_compact([1.25e7, -4.5e5, 99999, -0.3, np.nan])) == \
+        ['₹1.25 Crore', '-₹4.50 Lakh', '₹99,999', '₹0', '']
@@ -0,0 +1,72 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from indicators import atr, bollinger_bands, ema, macd, rsi, sma, zscore
+
+
+@pytest.fixture
+def prices():
+    rng = np.random.default_rng(0)
+    return pd.DataFrame(100 * np.exp(np.cumsum(rng.normal(0, 0.02, (300, 3)), axis=0)),
+                        index=pd.bdate_range('2020-01-01', periods=300), columns=['AAPL', 'MSFT', 'NVDA'])
+
+
+def loop_ema(values, alpha):
+    out, level = [], values[0]
+    for value in values:
+        level = alpha * value + (1 - alpha) * level
+        out.append(level)
+    return np.array(out)
+
+
+def test_moving_averages(prices):
+    values = prices['MSFT'].to_numpy()
+    np.testing.assert_allclose(sma(prices, 10)['MSFT'].iloc[9:], [values[i - 9:i + 1].mean() for i in range(9, 300)])
+    assert sma(prices, 10).iloc[:9].isna().all().all()
+
+    expected = loop_ema(values, 2 / 21)
+    np.testing.assert_allclose(ema(prices, 20)['MSFT'].iloc[19:], expected[19:])
+    assert ema(prices, 20).iloc[:19].isna().all().all()
+
+
+def test_rsi_uses_wilder_smoothing(prices):
+    change = np.diff(prices['NVDA'].to_numpy())
+    gain, loss = loop_ema(np.clip(change, 0, None), 1 / 14), loop_ema(np.clip(-change, 0, None), 1 / 14)
+    with np.errstate(divide='ignore'):
+        expected = 100 - 100 / (1 + gain / loss)
+    result = rsi(prices)['NVDA']
+    np.testing.assert_allclose(result.iloc[14:], expected[13:])
+    assert ((result.dropna() >= 0) & (result.dropna() <= 100)).all()
+
+
+def test_rsi_of_steady_rise_is_100():
+    rising = pd.DataFrame({'A': np.arange(1.0, 40.0)})
+    assert (rsi(rising).dropna() == 100).all().all()
+
+
+def test_macd_parts_fit_together(prices):
+    parts = macd(prices)
+    pd.testing.assert_frame_equal(parts['macd'], ema(prices, 12) - ema(prices, 26))
+    pd.testing.assert_frame_equal(parts['histogram'], parts['macd'] - parts['signal'])
+
+
+def test_bands_and_zscore_agree(prices):
+    bands = bollinger_bands(prices, 20, 2.0)
+    z = zscore(prices, 20)
+    # Upper band is exactly where the z-score reaches 2
+    at_upper = (bands['upper'] - bands['middle']) / (prices.rolling(20).std())
+    np.testing.assert_allclose(at_upper.dropna(), 2.0)
+    inside = (prices <= bands['upper']) & (prices >= bands['lower'])
+    pd.testing.assert_frame_equal(inside[z.notna()], (z.abs() <= 2)[z.notna()])
+
+
+def test_atr_true_range(prices):
+    close_only = atr(prices)
+    np.testing.assert_allclose(close_only['AAPL'].iloc[14:],
+                               loop_ema(np.abs(np.diff(prices['AAPL'].to_numpy())), 1 / 14)[13:])
+
+    high, low = prices * 1.01, prices * 0.99
+    h, l, c = (frame['AAPL'].to_numpy() for frame in (high, low, prices))
+    true_range = [max(h[i] - l[i], abs(h[i] - c[i - 1]), abs(l[i] - c[i - 1])) for i in range(1, 300)]
+    np.testing.assert_allclose(atr(prices, high, low)['AAPL'].iloc[14:], loop_ema(np.array(true_range), 1 / 14)[13:])
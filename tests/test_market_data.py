@@ -0,0 +1,232 @@
+import threading
+
+import pandas as pd
+import pytest
+
+from market_data import (LocalFileProvider, PriceStore, SingleFlight, SyntheticProvider, fetch_all, fetch_key,
+                         get_provider, longest_period, period_start, slice_period)
+
+PRICES = ['Open', 'High', 'Low', 'Close']
+
+
+class RecordingProvider(SyntheticProvider):
+    """Synthetic prices that log every request and can rescale or drop tickers"""
+
+    def __init__(self, missing=(), **kwargs):
+        super().__init__(**kwargs)
+        self.calls = []
+        self.missing = set(missing)
+        self.scale = 1.0
+
+    def history(self, ticker, start, end):
+        self.calls.append((ticker, pd.Timestamp(start), pd.Timestamp(end)))
+        if ticker in self.missing:
+            return pd.DataFrame()
+        history = super().history(ticker, start, end)
+        history[PRICES] *= self.scale
+        return history
+
+
+@pytest.fixture
+def provider():
+    return RecordingProvider()
+
+
+@pytest.fixture
+def store(provider, tmp_path):
+    return PriceStore(provider, root=tmp_path)
+
+
+# --- Price store ---
+def test_store_fetches_only_missing_head_and_tail(store, provider):
+    first = store.history('AAPL', '2020-06-01', '2020-12-31')
+    assert len(provider.calls) == 1
+
+    store.history('AAPL', '2020-06-01', '2020-12-31')
+    assert len(provider.calls) == 1
+
+    longer = store.history('AAPL', '2020-01-01', '2021-03-31')
+    head, tail = provider.calls[1:]
+    assert head[1:] == (pd.Timestamp('2020-01-01'), pd.Timestamp('2020-06-01'))
+    assert tail[1] >= pd.Timestamp('2020-12-01')
+    assert store.coverage('AAPL') == (pd.Timestamp('2020-01-01'), pd.Timestamp('2021-03-31'))
+
+    # Only the synthetic prices, not the volumes, agree across requests
+    expected = SyntheticProvider().history('AAPL', '2020-01-01', '2021-04-01')
+    pd.testing.assert_frame_equal(longer[PRICES], expected[PRICES], check_freq=False)
+    pd.testing.assert_frame_equal(first[PRICES], longer.loc['2020-06-01':'2020-12-31', PRICES], check_freq=False)
+
+
+def test_store_survives_a_new_instance(store, provider, tmp_path):
+    store.history('AAPL', '2020-01-01', '2020-12-31')
+    reopened = PriceStore(provider, root=tmp_path)
+    assert len(reopened.history('AAPL', '2020-03-01', '2020-09-30')) > 100
+    assert len(provider.calls) == 1
+    assert not list((tmp_path / provider.name).glob('*.tmp'))
+
+
+def test_store_refetches_readjusted_history(store, provider):
+    store.history('AAPL', '2020-01-01', '2020-12-31')
+    provider.scale = 0.5
+    history = store.history('AAPL', '2020-01-01', '2021-03-31')
+
+    assert provider.calls[-1][1] == pd.Timestamp('2020-01-01')
+    expected = SyntheticProvider().history('AAPL', '2020-01-01', '2021-04-01')['Close'] * 0.5
+    pd.testing.assert_series_equal(history['Close'], expected, check_freq=False)
+
+
+def test_store_does_not_record_empty_fetches(tmp_path):
+    provider = RecordingProvider(missing={'NOPE'})
+    store = PriceStore(provider, root=tmp_path)
+    assert store.history('NOPE', '2020-01-01', '2020-12-31').empty
+    assert store.coverage('NOPE') is None
+
+    # Once the provider has data, the whole range is asked for again
+    provider.missing.clear()
+    assert len(store.history('NOPE', '2020-01-01', '2020-12-31')) > 200
+    assert store.coverage('NOPE') == (pd.Timestamp('2020-01-01'), pd.Timestamp('2020-12-31'))
+
+
+# --- Providers ---
+def test_synthetic_provider_is_deterministic():
+    a = SyntheticProvider().history('AAPL', '2020-01-01', '2021-01-01')
+    b = SyntheticProvider().history('aapl', '2020-06-01', '2021-06-01')
+    shared = a.index.intersection(b.index)
+    assert len(shared) > 100
+    pd.testing.assert_series_equal(a['Close'].loc[shared], b['Close'].loc[shared])
+    assert not a['Close'].equals(SyntheticProvider(seed=1).history('AAPL', '2020-01-01', '2021-01-01')['Close'])
+
+
+def test_local_provider_reads_csv_and_parquet(tmp_path):
+    history = SyntheticProvider().history('AAPL', '2020-01-01', '2020-07-01')
+    history.to_csv(tmp_path / 'AAPL.csv')
+    history.tz_localize('America/New_York').to_parquet(tmp_path / 'BRK_B.parquet')
+
+    provider = LocalFileProvider(tmp_path)
+    for ticker in ('AAPL', 'BRK/B'):
+        window = provider.history(ticker, '2020-03-01', '2020-04-01')
+        assert window.index.min() >= pd.Timestamp('2020-03-01') and window.index.max() < pd.Timestamp('2020-04-01')
+        pd.testing.assert_series_equal(window['Close'], history['Close'].loc['2020-03-01':'2020-03-31'],
+                                       check_freq=False)
+    assert provider.history('MSFT', '2020-01-01', '2021-01-01').empty
+
+
+def test_get_provider(monkeypatch, tmp_path):
+    monkeypatch.setenv('MARKET_DATA_DIR', str(tmp_path))
+    assert isinstance(get_provider('local'), LocalFileProvider)
+    assert get_provider('local').root == tmp_path
+    monkeypatch.setenv('MARKET_DATA_PROVIDER', 'synthetic')
+    assert get_provider().name == 'synthetic'
+    with pytest.raises(ValueError):
+        get_provider('bloomberg')
+
+
+# --- Fetch scheduling ---
+def test_fetch_all_retries_only_listed_errors():
+    attempts = {'flaky': 0, 'limited': 0}
+
+    def fetch(key):
+        if key in attempts:
+            attempts[key] += 1
+            if key == 'limited' or attempts[key] < 3:
+                raise TimeoutError('rate limited')
+        if key == 'broken':
+            raise KeyError(key)
+        return key.upper()
+
+    results, status = fetch_all(fetch, ['ok', 'flaky', 'broken', 'limited', 'ok'], retry_on=(TimeoutError,),
+                                max_retries=3, base_delay=0)
+    assert results == {'ok': 'OK', 'flaky': 'FLAKY'}
+    assert list(status) == ['ok', 'flaky', 'broken', 'limited']
+    assert attempts == {'flaky': 3, 'limited': 4}
+    assert status['broken'].startswith('failed') and status['limited'].startswith('gave up after 4')
+
+
+def test_close_prices_reports_missing_tickers(tmp_path):
+    store = PriceStore(RecordingProvider(missing={'NOPE'}), root=tmp_path)
+    data, status = store.close_prices(['AAPL', 'MSFT', 'NOPE'], '1y')
+    assert list(data.columns) == ['AAPL', 'MSFT', 'NOPE']
+    assert isinstance(data.index, pd.DatetimeIndex)
+    assert data['NOPE'].isna().all() and data[['AAPL', 'MSFT']].notna().all().all()
+    assert status == {'AAPL': 'ok', 'MSFT': 'ok', 'NOPE': 'no data'}
+
+
+# --- Request coalescing ---
+def test_single_flight_coalesces_concurrent_calls():
+    flight = SingleFlight()
+    release, started = threading.Event(), threading.Event()
+    calls = []
+
+    def slow():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        return 'done'
+
+    results = []
+    leader = threading.Thread(target=lambda: results.append(flight.do('key', slow)))
+    leader.start()
+    started.wait(5)
+    followers = [threading.Thread(target=lambda: results.append(flight.do('key', slow))) for _ in range(3)]
+    for thread in followers:
+        thread.start()
+    while flight.stats()['coalesced'] < 3:
+        threading.Event().wait(0.01)
+    release.set()
+    for thread in [leader, *followers]:
+        thread.join(5)
+
+    assert results == ['done'] * 4 and len(calls) == 1
+    assert flight.stats() == {'issued': 1, 'coalesced': 3, 'in_flight': 0}
+    # Nothing is kept once the call is done
+    assert flight.do('key', lambda: 'again') == 'again'
+
+
+def test_single_flight_shares_errors():
+    flight = SingleFlight()
+    with pytest.raises(KeyError):
+        flight.do('key', lambda: {}['missing'])
+    assert flight.stats()['in_flight'] == 0
+
+
+def test_store_coalesces_concurrent_ticker_requests(tmp_path):
+    class SlowProvider(RecordingProvider):
+        def history(self, ticker, start, end):
+            threading.Event().wait(0.2)
+            return super().history(ticker, start, end)
+
+    provider = SlowProvider()
+    store = PriceStore(provider, root=tmp_path)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(store.history('AAPL', '2020-01-01', '2020-12-31')))
+               for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(10)
+
+    assert len(results) == 4 and len(provider.calls) == 1
+    assert all(result.equals(results[0]) for result in results)
+
+
+def test_fetch_key_ignores_order_and_case():
+    assert fetch_key(['msft', 'AAPL', 'MSFT'], '1y') == (('AAPL', 'MSFT'), '1y')
+
+
+# --- Periods ---
+def test_period_start():
+    today = '2024-03-31'
+    assert period_start('6mo', today) == pd.Timestamp('2023-09-30')
+    assert period_start('1y', today) == pd.Timestamp('2023-03-31')
+    assert period_start('10d', today) == pd.Timestamp('2024-03-21')
+    with pytest.raises(ValueError):
+        period_start('ytd', today)
+
+
+def test_shorter_horizons_are_slices_of_the_longest():
+    assert longest_period(['1mo', '20y', '1y', '6mo']) == '20y'
+    full = SyntheticProvider().history('AAPL', '2000-01-01', '2024-04-01')
+    for period in ('1mo', '1y', '5y'):
+        sliced = slice_period(full, period, today='2024-03-31')
+        direct = SyntheticProvider().history('AAPL', period_start(period, '2024-03-31'), '2024-04-01')
+        pd.testing.assert_series_equal(sliced['Close'], direct['Close'], check_freq=False)
@@ -0,0 +1,123 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from market_data import SyntheticProvider
+from peer_analysis import (TRADING_DAYS, cluster_order, leave_one_out_mean, return_correlation, risk_metrics,
+                           rolling_risk_metrics)
+
+
+def synthetic_closes(tickers, start='2020-01-01', end='2021-03-01'):
+    provider = SyntheticProvider()
+    return pd.DataFrame({ticker: provider.history(ticker, start, end)['Close'] for ticker in tickers})
+
+
+# --- Peer averages ---
+def test_leave_one_out_mean_matches_brute_force():
+    prices = synthetic_closes(['AAPL', 'MSFT', 'GOOG', 'AMZN'])
+    prices.iloc[5, 1] = np.nan
+    prices.iloc[7, [0, 2, 3]] = np.nan
+
+    result = leave_one_out_mean(prices)
+    for ticker in prices:
+        pd.testing.assert_series_equal(result[ticker], prices.drop(columns=ticker).mean(axis=1), check_names=False)
+
+
+def test_leave_one_out_mean_of_one_column_is_nan():
+    result = leave_one_out_mean(pd.DataFrame({'AAPL': [1.0, 2.0]}))
+    assert result['AAPL'].isna().all()
+
+
+# --- Risk metrics ---
+def brute_drawdown(series):
+    """Deepest drawdown and longest underwater run, day by day"""
+    peak, deepest, run, longest = -np.inf, 0.0, 0, 0
+    for price in series:
+        peak = max(peak, price)
+        deepest = min(deepest, price / peak - 1)
+        run = run + 1 if price < peak else 0
+        longest = max(longest, run)
+    return deepest * 100, longest
+
+
+def test_risk_metrics_match_direct_formulas():
+    prices = synthetic_closes(['AAPL', 'MSFT', 'GOOG'])
+    metrics = risk_metrics(prices, risk_free_rate=2)
+    returns = prices.pct_change().iloc[1:]
+
+    for ticker in prices:
+        r = returns[ticker]
+        peer = returns.drop(columns=ticker).mean(axis=1)
+        excess = r - 0.02 / TRADING_DAYS
+        row = metrics.loc[ticker]
+        assert row['Volatility (%)'] == pytest.approx(r.std() * np.sqrt(TRADING_DAYS) * 100)
+        assert row['Sharpe'] == pytest.approx(excess.mean() / r.std() * np.sqrt(TRADING_DAYS))
+        assert row['Beta vs peers'] == pytest.approx(np.cov(r, peer, ddof=0)[0, 1] / peer.var(ddof=0))
+        deepest, longest = brute_drawdown(prices[ticker])
+        assert row['Max drawdown (%)'] == pytest.approx(deepest)
+        assert row['Drawdown duration (days)'] == longest
+
+
+def test_rolling_drawdowns_stay_inside_window():
+    prices = synthetic_closes(['AAPL', 'MSFT', 'GOOG'])
+    window = 30
+    rolling = rolling_risk_metrics(prices, window)
+
+    duration = rolling['Drawdown duration (days)']
+    assert duration.iloc[:window - 1].isna().all().all()
+    assert (duration.iloc[window - 1:] <= window - 1).all().all()
+
+    # Each rolling value is the whole-sample metric of its own window
+    for row in (window - 1, len(prices) // 2, len(prices) - 1):
+        full = risk_metrics(prices.iloc[row - window + 1:row + 1])
+        np.testing.assert_allclose(rolling['Max drawdown (%)'].iloc[row], full['Max drawdown (%)'])
+        np.testing.assert_array_equal(duration.iloc[row], full['Drawdown duration (days)'])
+
+
+def test_rolling_statistics_match_pandas_windows():
+    prices = synthetic_closes(['AAPL', 'MSFT', 'GOOG'])
+    rolling = rolling_risk_metrics(prices, 60)
+    returns = prices.pct_change()
+    expected = returns.rolling(60).std() * np.sqrt(TRADING_DAYS) * 100
+    pd.testing.assert_frame_equal(rolling['Volatility (%)'], expected)
+
+    row = len(prices) - 1
+    window = returns.iloc[row - 59:row + 1]
+    peer = window.drop(columns='MSFT').mean(axis=1)
+    beta = np.cov(window['MSFT'], peer, ddof=0)[0, 1] / peer.var(ddof=0)
+    assert rolling['Beta vs peers']['MSFT'].iloc[row] == pytest.approx(beta)
+
+
+# --- Correlation ---
+def test_return_correlation_matches_pandas():
+    prices = synthetic_closes(['AAPL', 'MSFT', 'GOOG', 'AMZN'])
+    pd.testing.assert_frame_equal(return_correlation(prices), np.log(prices).diff().corr(), atol=1e-12)
+
+    # With gaps each column keeps its own mean, so pairs are close to
+    # pandas' pairwise-complete correlation rather than equal to it
+    prices.iloc[:60, 2] = np.nan
+    prices.iloc[100:110, 0] = np.nan
+    pd.testing.assert_frame_equal(return_correlation(prices), np.log(prices).diff().corr(), atol=1e-3)
+
+
+def test_cluster_order_groups_block_diagonal_matrix():
+    blocks = [['A1', 'A2', 'A3'], ['B1', 'B2'], ['C1', 'C2', 'C3', 'C4']]
+    names = [name for block in blocks for name in block]
+    within = {name: i for i, block in enumerate(blocks) for name in block}
+    corr = np.array([[1.0 if a == b else 0.8 if within[a] == within[b] else 0.05 for b in names] for a in names])
+
+    # Shuffle so the blocks are not already adjacent
+    shuffled = list(np.random.default_rng(0).permutation(names))
+    order = cluster_order(pd.DataFrame(corr, index=names, columns=names).loc[shuffled, shuffled])
+
+    assert sorted(order) == sorted(names)
+    groups = [within[name] for name in order]
+    # Every block is one contiguous run
+    assert sum(a != b for a, b in zip(groups, groups[1:])) == len(blocks) - 1
+
+
+def test_cluster_order_handles_missing_pairs_and_tiny_inputs():
+    corr = pd.DataFrame([[1, np.nan], [np.nan, 1]], index=['A', 'B'], columns=['A', 'B'])
+    assert sorted(cluster_order(corr)) == ['A', 'B']
+    assert cluster_order(pd.DataFrame([[1.0]], index=['A'], columns=['A'])) == ['A']
+    assert cluster_order(pd.DataFrame()) == []
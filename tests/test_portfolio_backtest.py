@@ -0,0 +1,86 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from market_data import SyntheticProvider
+from portfolio_backtest import backtest_weights, random_weights
+
+
+@pytest.fixture
+def prices():
+    provider = SyntheticProvider()
+    return pd.DataFrame({ticker: provider.history(ticker, '2018-01-01', '2021-01-01')['Close']
+                         for ticker in ('AAPL', 'MSFT', 'NVDA')})
+
+
+def step_prices():
+    """A flat asset and one that doubles at the start of February"""
+    dates = pd.bdate_range('2020-01-01', '2020-03-31')
+    return pd.DataFrame({'A': 100.0, 'B': np.where(dates.month == 1, 100.0, 200.0)}, index=dates)
+
+
+def test_buy_and_hold_tracks_weighted_price_relatives(prices):
+    weights = random_weights(5, 3, seed=1)
+    result = backtest_weights(prices, weights, rebalance='none', initial_investment=1000)
+
+    relatives = (prices / prices.iloc[0]).to_numpy()
+    expected = 1000 * relatives @ weights.T
+    np.testing.assert_allclose(result['equity'].to_numpy(), expected, rtol=1e-12)
+    np.testing.assert_allclose(result['nav'].to_numpy(), expected / 1000, rtol=1e-12)
+    summary = result['summary']
+    assert (summary['Turnover (%/yr)'] == 0).all() and (summary['Costs'] == 0).all()
+
+
+def test_rebalance_costs_and_turnover():
+    result = backtest_weights(step_prices(), [[0.5, 0.5]], rebalance='monthly', cost_bps=100,
+                              initial_investment=1000)
+    summary = result['summary'].loc[0]
+
+    # Day one: 1000 less 1% cost, split evenly. February: B doubles, the
+    # 495/990 book trades 247.5 each way back to equal weights at 1% of the
+    # sells plus buys, and March needs no trade
+    after_first = 990
+    held = np.array([after_first / 2, after_first])
+    trade = held.sum() / 2 - held[0]
+    second_cost = 0.01 * 2 * trade
+    assert summary['Costs'] == pytest.approx(0.01 * 1000 + second_cost)
+    assert summary['Final value'] == pytest.approx(held.sum() - second_cost)
+
+    years = (step_prices().index[-1] - step_prices().index[0]).days / 365.25
+    assert summary['Turnover (%/yr)'] == pytest.approx((1 / 6) / years * 100)
+
+
+def test_no_rebalance_without_drift_costs_nothing_extra():
+    dates = pd.bdate_range('2020-01-01', '2020-12-31')
+    prices = pd.DataFrame({'A': np.linspace(100, 150, len(dates))}, index=dates)
+    summary = backtest_weights(prices, [[1.0]], rebalance='monthly', cost_bps=50,
+                               initial_investment=1000)['summary'].loc[0]
+    assert summary['Turnover (%/yr)'] == 0
+    assert summary['Costs'] == pytest.approx(5)
+    assert summary['Final value'] == pytest.approx(995 * 1.5)
+
+
+def test_xirr_matches_cagr_without_contributions(prices):
+    result = backtest_weights(prices, random_weights(20, 3, seed=2), rebalance='quarterly',
+                              initial_investment=5000)
+    summary = result['summary']
+    days = (prices.index[-1] - prices.index[0]).days
+
+    # Both compound to the same growth; XIRR counts 365-day years, CAGR 365.25
+    growth = summary['Final value'] / 5000
+    np.testing.assert_allclose((1 + summary['XIRR (%)'] / 100) ** (days / 365), growth, rtol=1e-9)
+    np.testing.assert_allclose((1 + summary['CAGR (%)'] / 100) ** (days / 365.25), growth, rtol=1e-9)
+
+
+def test_contributions_add_to_invested(prices):
+    result = backtest_weights(prices, [[1, 1, 1]], initial_investment=1000, monthly_contribution=100)
+    months = prices.index.to_period('M').nunique()
+    assert result['invested'].iloc[-1] == pytest.approx(1000 + 100 * months)
+    assert result['summary'].loc[0, 'Invested'] == result['invested'].iloc[-1]
+
+
+def test_rejects_mismatched_weights(prices):
+    with pytest.raises(ValueError):
+        backtest_weights(prices, [[0.5, 0.5]])
+    with pytest.raises(ValueError):
+        backtest_weights(prices, [[1, 1, 1]], rebalance='weekly')
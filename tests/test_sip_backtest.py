@@ -0,0 +1,58 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from sip_backtest import backtest_rolling_sip, load_index_levels, summarize_backtest
+from sip_engine import sip_future_value_closed_form
+
+
+def constant_growth_levels(monthly_growth=0.01, months=240):
+    dates = pd.date_range('2000-01-01', periods=months, freq='MS')
+    return pd.Series(100 * (1 + monthly_growth) ** np.arange(months), index=dates)
+
+
+def test_backtest_on_constant_growth_index():
+    levels = constant_growth_levels()
+    windows = backtest_rolling_sip(levels, 5000, 10, step_up_rate=10)
+    expected = sip_future_value_closed_form(5000, 12, 10, 10, timing='start')
+
+    assert len(windows) == len(levels) - 120
+    np.testing.assert_allclose(windows['Final Corpus'], expected['future_value'], rtol=1e-10)
+    np.testing.assert_allclose(windows['Total Invested'], expected['total_invested'])
+    np.testing.assert_allclose(windows['XIRR'], (1.01 ** 12 - 1) * 100, atol=1e-6)
+
+
+def test_backtest_matches_month_by_month_loop():
+    rng = np.random.default_rng(0)
+    levels = pd.Series(100 * np.exp(np.cumsum(rng.normal(0.008, 0.05, 150))),
+                       index=pd.date_range('2005-01-01', periods=150, freq='MS'))
+    windows = backtest_rolling_sip(levels, 1000, 5, step_up_rate=8)
+
+    for start in (0, 17, len(windows) - 1):
+        units = sum(1000 * 1.08 ** (month // 12) / levels.iloc[start + month] for month in range(60))
+        assert windows['Final Corpus'].iloc[start] == pytest.approx(units * levels.iloc[start + 60])
+        assert windows['End'].iloc[start] == levels.index[start + 60]
+
+
+def test_backtest_needs_enough_history():
+    with pytest.raises(ValueError):
+        backtest_rolling_sip(constant_growth_levels(months=24), 5000, 2)
+
+
+def test_load_index_levels_keeps_last_level_per_month(tmp_path):
+    dates = pd.bdate_range('2020-01-01', '2020-03-31')
+    daily = pd.DataFrame({'Open': 1.0, 'Close': np.arange(len(dates), dtype=float)}, index=dates)
+    daily.to_csv(tmp_path / 'index.csv')
+    daily.to_parquet(tmp_path / 'index.parquet')
+
+    for name in ('index.csv', 'index.parquet'):
+        monthly = load_index_levels(tmp_path / name)
+        assert list(monthly.index) == list(pd.date_range('2020-01-01', periods=3, freq='MS'))
+        assert list(monthly) == [daily['Close'][daily.index.month == m].iloc[-1] for m in (1, 2, 3)]
+
+
+def test_summary_percentiles():
+    windows = backtest_rolling_sip(constant_growth_levels(), 5000, 10)
+    summary = summarize_backtest(windows)
+    assert list(summary.index) == ['P10', 'P25', 'P50', 'P75', 'P90']
+    np.testing.assert_allclose(summary['XIRR'], (1.01 ** 12 - 1) * 100, atol=1e-6)
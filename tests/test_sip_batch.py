@@ -0,0 +1,62 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from sip_batch import main, project_chunk, run_batch
+from sip_engine import sip_future_value_closed_form
+
+
+@pytest.fixture
+def clients(tmp_path):
+    """A client book whose notes column is empty in the first chunks and filled later"""
+    rng = np.random.default_rng(0)
+    n = 250
+    book = pd.DataFrame({
+        'client_id': [f"{i:05d}" for i in range(n)],
+        'monthly_investment': rng.integers(1, 50, n) * 1000,
+        'annual_rate': rng.choice([8, 10.5, 12], n),
+        'years': rng.integers(1, 30, n),
+        'step_up_rate': np.where(np.arange(n) % 7 == 0, np.nan, rng.choice([0, 5, 10], n)),
+        'notes': np.where(np.arange(n) >= 180, 'x', None),
+    })
+    path = tmp_path / 'clients.csv'
+    book.to_csv(path, index=False)
+    return path, book
+
+
+def expected_projection(book, step_up_rate=0.0):
+    result = sip_future_value_closed_form(book['monthly_investment'], book['annual_rate'], book['years'],
+                                          book['step_up_rate'].fillna(step_up_rate))
+    return pd.DataFrame({key: result[key] for key in ('total_invested', 'future_value')})
+
+
+@pytest.mark.parametrize('suffix', ['csv', 'parquet'])
+@pytest.mark.parametrize('workers', [1, 2])
+def test_chunked_output_matches_whole_book(tmp_path, clients, suffix, workers):
+    path, book = clients
+    output = tmp_path / f"out.{suffix}"
+    rows = run_batch(path, output, chunksize=40, workers=workers, step_up_rate=3)
+    assert rows == len(book)
+
+    out = pd.read_parquet(output) if suffix == 'parquet' else pd.read_csv(output, dtype={'client_id': str})
+    # Input order is kept whatever order the workers finish in
+    assert list(out['client_id']) == list(book['client_id'])
+    assert out['notes'].isna().sum() == 180 and (out['notes'].dropna() == 'x').all()
+    expected = expected_projection(book, step_up_rate=3)
+    np.testing.assert_allclose(out['future_value'], expected['future_value'], rtol=1e-12)
+    np.testing.assert_allclose(out['total_invested'], expected['total_invested'], rtol=1e-12)
+
+
+def test_xirr_column(tmp_path, clients):
+    path, book = clients
+    output = tmp_path / 'out.parquet'
+    main([str(path), str(output), '--chunksize', '100', '--xirr'])
+    out = pd.read_parquet(output)
+    # Growth at r% a month compounded gives an XIRR of (1 + r/12)**12 - 1
+    expected = ((1 + book['annual_rate'] / 1200) ** 12 - 1) * 100
+    np.testing.assert_allclose(out['xirr'], expected, atol=1e-6)
+
+
+def test_missing_required_column():
+    with pytest.raises(ValueError, match='annual_rate'):
+        project_chunk(pd.DataFrame({'monthly_investment': [1000], 'years': [10]}))
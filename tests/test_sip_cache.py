@@ -0,0 +1,63 @@
+import numpy as np
+
+from sip_cache import ResultCache, normalize_params
+
+
+def test_normalize_params_ignores_order_and_float_noise():
+    assert normalize_params({'a': 1.0, 'b': 0.1 + 0.2}) == normalize_params({'b': 0.3, 'a': np.int64(1)})
+
+
+def test_lru_eviction_without_spill():
+    cache = ResultCache(max_entries=2)
+    for n in range(3):
+        cache.put({'n': n}, n)
+    assert cache.get({'n': 0}) is None
+    assert cache.get({'n': 2}) == 2
+    assert cache.stats()['evictions'] == 1
+
+
+def test_spilled_entry_is_promoted_and_its_file_removed(tmp_path):
+    cache = ResultCache(max_entries=1, spill_dir=tmp_path)
+    cache.put({'n': 0}, 'zero')
+    cache.put({'n': 1}, 'one')
+    assert [path.name for path in tmp_path.iterdir()] == [f"{cache.key_for({'n': 0})}.pkl"]
+
+    # Promoting 0 evicts 1, so exactly one file remains either way
+    assert cache.get({'n': 0}) == 'zero'
+    assert [path.name for path in tmp_path.iterdir()] == [f"{cache.key_for({'n': 1})}.pkl"]
+    stats = cache.stats()
+    assert stats['disk_hits'] == 1 and stats['spilled'] == 1
+
+
+def test_spill_directory_is_bounded(tmp_path):
+    payload = np.zeros(10_000)
+    cache = ResultCache(max_entries=1, spill_dir=tmp_path, max_spill_bytes=3 * payload.nbytes)
+    for n in range(10):
+        cache.put({'n': n}, payload)
+
+    files = list(tmp_path.iterdir())
+    assert sum(path.stat().st_size for path in files) <= cache.max_spill_bytes
+    assert len(files) == cache.stats()['spilled'] == 2
+    # The most recently evicted entries are the ones kept
+    assert cache.get({'n': 8}) is not None and cache.get({'n': 0}) is None
+
+
+def test_spill_limit_applies_to_files_from_earlier_runs(tmp_path):
+    earlier = ResultCache(max_entries=1, spill_dir=tmp_path)
+    for n in range(5):
+        earlier.put({'n': n}, np.zeros(10_000))
+    assert len(list(tmp_path.iterdir())) == 4
+
+    later = ResultCache(max_entries=1, spill_dir=tmp_path, max_spill_bytes=100_000)
+    assert len(list(tmp_path.iterdir())) == later.stats()['spilled'] == 1
+    assert later.get({'n': 3}) is not None
+
+
+def test_truncated_spill_file_is_a_miss(tmp_path):
+    cache = ResultCache(max_entries=1, spill_dir=tmp_path)
+    cache.put({'n': 0}, 'zero')
+    cache.put({'n': 1}, 'one')
+    cache._spill_path(cache.key_for({'n': 0})).write_bytes(b'\x80')
+
+    assert cache.get({'n': 0}) is None
+    assert not cache._spill_path(cache.key_for({'n': 0})).exists()
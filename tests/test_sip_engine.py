@@ -0,0 +1,103 @@
+import numpy as np
+import pytest
+
+from sip_engine import (calculate_sip_batch, calculate_sip_with_stepup, minimum_years, required_monthly_sip,
+                        required_step_up, sip_future_value_closed_form, sip_monthly_schedule)
+
+PLANS = [
+    # monthly_investment, annual_rate, years, step_up_rate, inflation_rate
+    (5000, 12, 10, 0, 0),
+    (5000, 12, 10, 10, 6),
+    (2500, 0, 15, 5, 4),
+    (10000, 8.5, 1, 20, 0),
+    (1000, 25, 30, 15, 7),
+]
+
+
+# --- Batch SIP ---
+@pytest.mark.parametrize('plan', PLANS)
+def test_batch_matches_scalar(plan):
+    scalar = calculate_sip_with_stepup(*plan)
+    batch = calculate_sip_batch(*plan)
+    for key in ('total_invested', 'future_value', 'total_returns', 'inflation_adjusted_value', 'effective_rate'):
+        assert batch[key] == pytest.approx(scalar[key], rel=1e-12)
+
+
+def test_batch_broadcasts_and_pads():
+    years = np.array([5, 10, 20])
+    batch = calculate_sip_batch(5000, np.array([[8], [12]]), years, 10, 6)
+    assert batch['future_value'].shape == (2, 3)
+    for row, rate in enumerate((8, 12)):
+        for col, n in enumerate(years):
+            scalar = calculate_sip_with_stepup(5000, rate, int(n), 10, 6)
+            assert batch['future_value'][row, col] == pytest.approx(scalar['future_value'], rel=1e-12)
+
+
+def test_batch_yearly_rows_match_scalar_table():
+    batch = calculate_sip_batch(5000, 12, np.array([5, 10]), 10, 6)
+    for row, n in enumerate((5, 10)):
+        table = calculate_sip_with_stepup(5000, 12, n, 10, 6)['yearly_data']
+        np.testing.assert_allclose(batch['yearly_future_value'][row, :n], [y['Future Value'] for y in table])
+        np.testing.assert_allclose(batch['yearly_real_value'][row, :n], [y['Real Value'] for y in table])
+        assert np.isnan(batch['yearly_future_value'][row, n:]).all()
+
+
+# --- Closed form ---
+@pytest.mark.parametrize('plan', PLANS)
+def test_closed_form_matches_scalar(plan):
+    scalar = calculate_sip_with_stepup(*plan)
+    closed = sip_future_value_closed_form(*plan)
+    for key in ('total_invested', 'future_value', 'inflation_adjusted_value'):
+        assert closed[key] == pytest.approx(scalar[key], rel=1e-10)
+
+
+@pytest.mark.parametrize('timing', ['start', 'end'])
+@pytest.mark.parametrize('step_up_month', [1, 5, 12])
+def test_closed_form_matches_monthly_schedule(timing, step_up_month):
+    for rate, years in ((12, 7), (0, 3)):
+        schedule = sip_monthly_schedule(5000, rate, years, 10, 6, step_up_month, timing)
+        closed = sip_future_value_closed_form(5000, rate, years, 10, 6, step_up_month, timing)
+        assert closed['future_value'] == pytest.approx(schedule['Future Value'].iloc[-1], rel=1e-10)
+        assert closed['total_invested'] == pytest.approx(schedule['Cumulative Investment'].iloc[-1], rel=1e-10)
+        assert closed['inflation_adjusted_value'] == pytest.approx(schedule['Real Value'].iloc[-1], rel=1e-10)
+
+
+def test_closed_form_rejects_bad_options():
+    with pytest.raises(ValueError):
+        sip_future_value_closed_form(5000, 12, 10, timing='middle')
+    with pytest.raises(ValueError):
+        sip_future_value_closed_form(5000, 12, 10, step_up_month=13)
+
+
+# --- Goal seek ---
+def test_required_monthly_sip_round_trip():
+    monthly = required_monthly_sip(1e7, 12, 20, step_up_rate=10)
+    assert sip_future_value_closed_form(monthly, 12, 20, 10)['future_value'] == pytest.approx(1e7)
+
+
+def test_required_monthly_sip_real_target():
+    monthly = required_monthly_sip(1e7, 12, 20, inflation_rate=6, real=True)
+    result = sip_future_value_closed_form(monthly, 12, 20, inflation_rate=6)
+    assert result['inflation_adjusted_value'] == pytest.approx(1e7)
+
+
+def test_required_step_up_round_trip():
+    step_up = required_step_up(1e7, 5000, 12, 20)
+    assert sip_future_value_closed_form(5000, 12, 20, step_up)['future_value'] == pytest.approx(1e7, rel=1e-6)
+    assert required_step_up(1e3, 5000, 12, 20) == 0
+    assert np.isnan(required_step_up(1e15, 5000, 12, 20))
+
+
+def test_minimum_years_round_trip():
+    years = int(minimum_years(1e7, 10000, 12, step_up_rate=5))
+    value = lambda n: sip_future_value_closed_form(10000, 12, n, 5)['future_value']
+    assert value(years) >= 1e7 > value(years - 1)
+    assert minimum_years(1e15, 100, 1, max_years=10) == 0
+
+
+def test_goal_seek_broadcasts():
+    targets = np.array([1e6, 1e7, 5e7])
+    monthly = required_monthly_sip(targets, np.array([[8], [12]]), 15)
+    assert monthly.shape == (2, 3)
+    np.testing.assert_allclose(sip_future_value_closed_form(monthly, np.array([[8], [12]]), 15)['future_value'],
+                               np.broadcast_to(targets, (2, 3)))
@@ -0,0 +1,38 @@
+import numpy as np
+import pytest
+
+from sip_engine import calculate_sip_with_stepup
+from sip_montecarlo import simulate_sip_paths, sip_percentile_bands
+
+
+@pytest.mark.parametrize('antithetic', [True, False])
+def test_zero_volatility_reproduces_fixed_rate(antithetic):
+    corpus = simulate_sip_paths(5000, 12, 20, step_up_rate=10, volatility=0, n_paths=7, seed=0,
+                                chunk_size=3, antithetic=antithetic)
+    # calculate_sip_with_stepup's yearly rows are valued at the horizon, so
+    # each year-end corpus is the final value of a plan that long
+    yearly = [calculate_sip_with_stepup(5000, 12, year, 10)['future_value'] for year in range(1, 21)]
+    assert corpus.shape == (20, 7)
+    np.testing.assert_allclose(corpus, np.broadcast_to(np.array(yearly)[:, None], corpus.shape), rtol=1e-5)
+
+
+def test_mean_corpus_matches_expected_rate():
+    # Monthly growth has mean 1 + r/12, so the mean corpus is the fixed-rate one
+    corpus = simulate_sip_paths(5000, 12, 10, volatility=20, n_paths=40000, seed=1)
+    expected = calculate_sip_with_stepup(5000, 12, 10)['future_value']
+    assert corpus[-1].mean() == pytest.approx(expected, rel=0.01)
+
+
+def test_seeded_runs_repeat_and_chunks_cover_all_paths():
+    a = simulate_sip_paths(1000, 10, 5, n_paths=1001, seed=3, chunk_size=250)
+    b = simulate_sip_paths(1000, 10, 5, n_paths=1001, seed=3, chunk_size=250)
+    np.testing.assert_array_equal(a, b)
+    assert np.isfinite(a).all() and (a > 0).all()
+
+
+def test_bands_are_ordered_and_deflated():
+    result = sip_percentile_bands(5000, 12, 15, inflation_rate=6, n_paths=5000, seed=2)
+    bands = result['bands']
+    assert (bands[10] <= bands[50]).all() and (bands[50] <= bands[90]).all()
+    np.testing.assert_allclose(result['real_bands'][50], bands[50] / 1.06 ** result['years'])
+    assert len(result['final_values']) == 5000
@@ -0,0 +1,76 @@
+import numpy as np
+import pytest
+
+from sip_engine import calculate_sip_with_stepup
+from sip_portfolio import simulate_sip_portfolio, summarize_portfolio
+
+WEIGHTS = [0.5, 0.3, 0.2]
+RETURNS = [4.0, 12.0, 20.0]
+
+
+def month_by_month(monthly_investment, years, weights, annual_returns, step_up_rate=0,
+                   rebalance='annual', threshold=5.0):
+    """Reference loop at fixed monthly growth: grow, invest, then rebalance if due"""
+    weights = np.asarray(weights) / np.sum(weights)
+    growth = 1 + np.asarray(annual_returns) / 1200
+    holdings, corpus, rebalances = np.zeros(len(weights)), [], 0
+    for month in range(years * 12):
+        holdings = holdings * growth + monthly_investment * (1 + step_up_rate / 100) ** (month // 12) * weights
+        drifted = np.abs(holdings / holdings.sum() - weights).max() > threshold / 100
+        if (rebalance == 'threshold' and drifted) or \
+                (rebalance == 'annual' and month % 12 == 11 and month < years * 12 - 1):
+            holdings = holdings.sum() * weights
+            rebalances += 1
+        if month % 12 == 11:
+            corpus.append(holdings.sum())
+    return np.array(corpus), holdings, rebalances
+
+
+def test_single_fund_matches_fixed_rate_calculator():
+    result = simulate_sip_portfolio(5000, 15, [1.0], [12.0], step_up_rate=10)
+    yearly = [calculate_sip_with_stepup(5000, 12, year, 10)['future_value'] for year in range(1, 16)]
+    np.testing.assert_allclose(result['corpus'][0], yearly, rtol=1e-12)
+    assert result['total_invested'] == pytest.approx(calculate_sip_with_stepup(5000, 12, 15, 10)['total_invested'])
+
+
+@pytest.mark.parametrize('rebalance', ['none', 'annual', 'threshold'])
+def test_fixed_rate_matches_month_by_month_loop(rebalance):
+    result = simulate_sip_portfolio(5000, 10, WEIGHTS, RETURNS, step_up_rate=5, rebalance=rebalance)
+    corpus, holdings, rebalances = month_by_month(5000, 10, WEIGHTS, RETURNS, 5, rebalance)
+    np.testing.assert_allclose(result['corpus'][0], corpus, rtol=1e-10)
+    np.testing.assert_allclose(result['final_holdings'][0], holdings, rtol=1e-10)
+    assert result['rebalances'][0] == rebalances
+
+
+def test_annual_rebalance_skips_the_final_year_end():
+    result = simulate_sip_portfolio(5000, 10, WEIGHTS, RETURNS, rebalance='annual')
+    assert result['rebalances'][0] == 9
+
+    # The final weights show the drift of the last year, not the targets
+    summary = summarize_portfolio(result, ['Debt', 'Hybrid', 'Equity'])
+    assert not np.allclose(summary['Final Weight (%)'], np.array(WEIGHTS) * 100, atol=0.1)
+    assert summary['Final Weight (%)'].iloc[-1] > 20
+
+
+def test_gains_and_transfers_add_up():
+    result = simulate_sip_portfolio(5000, 12, WEIGHTS, RETURNS, volatilities=[5, 15, 25], rebalance='threshold',
+                                    n_paths=500, seed=0)
+    total = result['final_holdings'].sum(axis=1)
+    np.testing.assert_allclose(result['corpus'][:, -1], total, rtol=1e-5)
+    # Rebalancing moves money between funds but never creates any
+    np.testing.assert_allclose(result['fund_gains'].sum(axis=1), total - result['total_invested'], rtol=1e-4)
+    assert (result['rebalances'] > 0).all()
+
+
+def test_correlated_paths_and_bad_correlation():
+    correlation = np.array([[1.0, 0.9], [0.9, 1.0]])
+    result = simulate_sip_portfolio(1000, 5, [0.5, 0.5], [10, 10], volatilities=[20, 20], correlation=correlation,
+                                    n_paths=2000, seed=1, antithetic=False, rebalance='none')
+    fund_returns = np.log(result['final_holdings'])
+    assert np.corrcoef(fund_returns.T)[0, 1] > 0.8
+
+    with pytest.raises(ValueError):
+        simulate_sip_portfolio(1000, 5, [1, 1, 1], [10] * 3, volatilities=[20] * 3,
+                               correlation=np.full((3, 3), -0.9) + 1.9 * np.eye(3), n_paths=10)
+    with pytest.raises(ValueError):
+        simulate_sip_portfolio(1000, 5, [1], [10], rebalance='weekly')
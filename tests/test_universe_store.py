@@ -0,0 +1,72 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from market_data import LocalFileProvider, PriceStore, SyntheticProvider
+from peer_analysis import return_correlation
+from universe_store import UniverseStore, build_universe_store, current_version, open_universe
+
+TICKERS = ['AAPL', 'MSFT', 'NVDA']
+SPLIT_DAY = '2021-06-10'
+
+
+@pytest.fixture
+def split_fixtures(tmp_path):
+    """Raw Yahoo-style files where NVDA splits 4-for-1 mid-history; Adj Close is unaffected"""
+    synthetic = SyntheticProvider()
+    root = tmp_path / 'fixtures'
+    root.mkdir()
+    adjusted = {}
+    for ticker in TICKERS:
+        history = synthetic.history(ticker, '2021-01-01', '2021-12-31')
+        adjusted[ticker] = history['Close']
+        raw = history.rename(columns={'Close': 'Adj Close'})
+        raw['Close'] = raw['Adj Close']
+        if ticker == 'NVDA':
+            raw.loc[:SPLIT_DAY, 'Close'] *= 4
+        raw.to_csv(root / f"{ticker}.csv")
+    return root, pd.DataFrame(adjusted)
+
+
+def build(tmp_path, provider, tickers=TICKERS):
+    price_store = PriceStore(provider, root=tmp_path / 'prices')
+    version, status = build_universe_store(tickers, '30y', tmp_path / 'universe', price_store, workers=2)
+    return version, status
+
+
+def test_store_keeps_raw_and_adjusted_closes(tmp_path, split_fixtures):
+    fixtures, adjusted = split_fixtures
+    build(tmp_path, LocalFileProvider(fixtures))
+    universe = open_universe(tmp_path / 'universe')
+
+    raw, adj = universe.frame('close'), universe.frame('adj_close')
+    jump = raw['NVDA'].iloc[1:].to_numpy() / raw['NVDA'].iloc[:-1].to_numpy()
+    assert jump.min() < 0.3
+    np.testing.assert_allclose(adj.to_numpy(), adjusted[universe.tickers].to_numpy(), rtol=1e-6)
+
+
+def test_correlation_ignores_split(tmp_path, split_fixtures):
+    fixtures, adjusted = split_fixtures
+    build(tmp_path, LocalFileProvider(fixtures))
+    universe = open_universe(tmp_path / 'universe')
+
+    # The stock page correlates adjusted closes from the store
+    expected = return_correlation(adjusted[TICKERS])
+    from_store = return_correlation(universe.frame('adj_close', TICKERS))
+    np.testing.assert_allclose(from_store.to_numpy(), expected.to_numpy(), atol=1e-5)
+
+    # Raw closes would put the split day's -139% log return into every NVDA pair
+    from_raw = return_correlation(universe.frame('close', TICKERS))
+    assert not np.allclose(from_raw.to_numpy(), expected.to_numpy(), atol=1e-2)
+
+
+def test_rebuild_publishes_new_version(tmp_path):
+    first, _ = build(tmp_path, SyntheticProvider(), ['AAPL'])
+    second, status = build(tmp_path, SyntheticProvider(), ['AAPL', 'MSFT'])
+    assert status == {'AAPL': 'ok', 'MSFT': 'ok'}
+    assert current_version(tmp_path / 'universe') == second.name != first.name
+
+    # A reader opened on the old version keeps working alongside the new one
+    old = UniverseStore(tmp_path / 'universe', first.name)
+    assert old.tickers == ['AAPL']
+    assert open_universe(tmp_path / 'universe').tickers == ['AAPL', 'MSFT']
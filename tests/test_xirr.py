@@ -0,0 +1,51 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from sip_engine import sip_future_value_closed_form, sip_xirr
+from xirr import irr_from_times, pad_cash_flows, xirr, xirr_batch
+
+
+def test_xirr_recovers_known_rate():
+    dates = pd.to_datetime(['2020-01-01', '2021-01-01', '2022-06-15']).to_numpy()
+    years = (dates - dates[0]) / np.timedelta64(365, 'D')
+    amounts = [-1000, -500, 0]
+    amounts[-1] = -sum(a * 1.11 ** (years[-1] - t) for a, t in zip(amounts[:-1], years[:-1]))
+    assert xirr(dates, amounts) == pytest.approx(11, abs=1e-8)
+
+
+def test_xirr_batch_ragged_rows_and_no_sign_change():
+    rates = xirr_batch(
+        [['2021-01-01', '2022-01-01'], ['2021-01-01', '2022-01-01'], ['2021-01-01', '2021-07-02', '2022-01-01']],
+        [[-100, 110], [-100, -10], [-100, -100, 250]],
+    )
+    assert rates[0] == pytest.approx(10, abs=1e-8)
+    assert np.isnan(rates[1])
+    # Third row solved on its own gives the same answer as in the batch
+    assert rates[2] == pytest.approx(xirr(['2021-01-01', '2021-07-02', '2022-01-01'], [-100, -100, 250]))
+
+
+def test_irr_handles_losses_and_extreme_gains():
+    rates = irr_from_times([[0, 1], [0, 1], [0, 1]], [[-100, 50], [-100, 900], [-100, 1.5]])
+    np.testing.assert_allclose(rates, [-50, 800, -98.5], atol=1e-8)
+
+
+def test_pad_cash_flows():
+    amounts, dates = pad_cash_flows([[-1, 2], [-1, -1, 3]], [['2020-01-01', '2021-01-01'],
+                                                             ['2020-01-01', '2020-06-01', '2021-01-01']])
+    np.testing.assert_array_equal(amounts, [[-1, 2, 0], [-1, -1, 3]])
+    assert np.isnat(dates[0, 2]) and not np.isnat(dates[1]).any()
+
+
+@pytest.mark.parametrize('rate, step_up', [(12, 0), (8, 10), (0, 5)])
+def test_sip_xirr_round_trip(rate, step_up):
+    # A plan compounding monthly at r earns (1 + r/12)**12 - 1 a year
+    future_value = sip_future_value_closed_form(5000, rate, 15, step_up)['future_value']
+    assert sip_xirr(5000, 15, step_up, future_value) == pytest.approx(((1 + rate / 1200) ** 12 - 1) * 100, abs=1e-6)
+
+
+def test_sip_xirr_broadcasts_over_tenures():
+    years = np.array([1, 5, 30])
+    future_value = sip_future_value_closed_form(2000, 10, years, 7, timing='start')['future_value']
+    np.testing.assert_allclose(sip_xirr(2000, years, 7, future_value, timing='start'),
+                               ((1 + 10 / 1200) ** 12 - 1) * 100, atol=1e-6)
@@ -0,0 +1,131 @@
+"""Memory-mapped price arrays for the whole STOCKS universe.
+
+An offline job writes dates x tickers float32 arrays of close, adjusted
+close and volume, one .npy file each:
+
+    python universe_store.py --period 20y --workers 8
+
+Readers open the arrays with mmap_mode='r', so every Streamlit worker on the
+machine shares the same pages through the OS cache and opening the store
+costs milliseconds whatever its size. Each build goes to a fresh version
+directory and the CURRENT file is switched to it atomically, so a rebuild
+never disturbs readers of the previous version.
+"""
+import argparse
+import json
+import os
+import shutil
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from market_data import STOCKS, PriceStore, fetch_all, get_provider, period_start
+
+UNIVERSE_STORE_DIR = Path(os.environ.get('UNIVERSE_STORE_DIR', Path(__file__).parent / '.universe_store'))
+FIELDS = {'close': 'Close', 'adj_close': 'Adj Close', 'volume': 'Volume'}
+KEEP_VERSIONS = 2
+
+
+# --- Build ---
+def build_universe_store(tickers=STOCKS, period='20y', root=UNIVERSE_STORE_DIR, price_store=None, workers=8):
+    """Fetch `tickers` over `period` and publish them as a new store version.
+
+    Histories come through a PriceStore over the provider's unadjusted
+    variant (raw Close plus Adj Close), so a rebuild only downloads what is
+    new. Providers without that distinction, such as the synthetic one,
+    store the same series for both. Tickers that fail to load are left out
+    and listed in the return value.
+    Returns (version directory, {ticker: status}).
+    """
+    root = Path(root)
+    price_store = price_store or PriceStore(get_provider().unadjusted())
+    start = period_start(period)
+    histories, status = fetch_all(lambda ticker: price_store.history(ticker, start), tickers,
+                                  max_workers=workers, retry_on=price_store.provider.retryable_errors)
+    histories = {ticker: history for ticker, history in histories.items() if not history.empty}
+    if not histories:
+        raise RuntimeError("No price history could be loaded for the universe.")
+
+    names = list(histories)
+    dates = pd.DatetimeIndex(sorted(set().union(*(h.index for h in histories.values()))))
+    version = root / pd.Timestamp.now().strftime('%Y%m%d-%H%M%S-%f')
+    version.mkdir(parents=True)
+
+    for field, column in FIELDS.items():
+        values = np.full((len(dates), len(names)), np.nan, dtype=np.float32)
+        for j, ticker in enumerate(names):
+            history = histories[ticker]
+            series = history[column] if column in history else history['Close']
+            values[dates.get_indexer(history.index), j] = series.to_numpy(dtype=np.float32)
+        np.save(version / f"{field}.npy", values)
+    np.save(version / 'dates.npy', dates.to_numpy().astype('datetime64[D]'))
+    (version / 'meta.json').write_text(json.dumps({
+        'tickers': names, 'period': period, 'provider': price_store.provider.name,
+        'built': pd.Timestamp.now().isoformat(timespec='seconds'),
+    }))
+
+    # Publish atomically, then drop versions no reader can still be opening
+    pointer = root / 'CURRENT.tmp'
+    pointer.write_text(version.name)
+    os.replace(pointer, root / 'CURRENT')
+    old = sorted(p for p in root.iterdir() if p.is_dir())[:-KEEP_VERSIONS]
+    for path in old:
+        shutil.rmtree(path, ignore_errors=True)
+    return version, status
+
+
+# --- Read ---
+def current_version(root=UNIVERSE_STORE_DIR):
+    """Name of the published store version, or None if none has been built"""
+    pointer = Path(root) / 'CURRENT'
+    return pointer.read_text().strip() if pointer.exists() else None
+
+
+class UniverseStore:
+    """Read-only view of one store version (the current one by default); arrays are memory-mapped, not loaded"""
+
+    def __init__(self, root=UNIVERSE_STORE_DIR, version=None):
+        root = Path(root)
+        self.version = version or current_version(root)
+        self.path = root / self.version
+        self.meta = json.loads((self.path / 'meta.json').read_text())
+        self.tickers = self.meta['tickers']
+        self.dates = pd.DatetimeIndex(np.load(self.path / 'dates.npy'), name='Date')
+        self._columns = {ticker: j for j, ticker in enumerate(self.tickers)}
+        self.arrays = {field: np.load(self.path / f"{field}.npy", mmap_mode='r') for field in FIELDS}
+
+    def frame(self, field='close', tickers=None, start=None):
+        """Dates x tickers frame of one field, optionally for some tickers and from `start` on"""
+        first = 0 if start is None else self.dates.searchsorted(pd.Timestamp(start))
+        values = self.arrays[field][first:]
+        if tickers is None:
+            tickers = self.tickers
+        else:
+            values = values[:, [self._columns[ticker] for ticker in tickers]]
+        return pd.DataFrame(values, index=self.dates[first:], columns=list(tickers))
+
+
+def open_universe(root=UNIVERSE_STORE_DIR):
+    """The current UniverseStore, or None if no store has been built yet"""
+    version = current_version(root)
+    return UniverseStore(root, version) if version else None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build the memory-mapped price store for the STOCKS universe.")
+    parser.add_argument("--period", default="20y", help="history to keep, yfinance style (default: 20y)")
+    parser.add_argument("--root", default=str(UNIVERSE_STORE_DIR), help="store directory")
+    parser.add_argument("--workers", type=int, default=8, help="concurrent ticker downloads (default: 8)")
+    parser.add_argument("--tickers", nargs="*", help="tickers to include (default: the STOCKS list)")
+    args = parser.parse_args(argv)
+
+    version, status = build_universe_store(args.tickers or STOCKS, args.period, args.root, workers=args.workers)
+    failed = {ticker: reason for ticker, reason in status.items() if reason != 'ok'}
+    print(f"Built {version} with {len(status) - len(failed)} tickers")
+    for ticker, reason in failed.items():
+        print(f"  skipped {ticker}: {reason}")
+
+
+if __name__ == "__main__":
+    main()
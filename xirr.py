@@ -0,0 +1,107 @@
+import numpy as np
+
+
+# --- Padding ---
+def pad_cash_flows(amounts, dates=None):
+    """Stack ragged per-portfolio cash flows into NaN-padded 2-D arrays.
+
+    `amounts` (and `dates`, if given) are sequences of 1-D sequences, one per
+    portfolio. Returns (amounts, dates) as (portfolios, max_flows) arrays with
+    amounts padded by 0 and dates by NaT.
+    """
+    width = max((len(a) for a in amounts), default=0)
+    padded_amounts = np.zeros((len(amounts), width))
+    for row, flows in enumerate(amounts):
+        padded_amounts[row, :len(flows)] = flows
+
+    if dates is None:
+        return padded_amounts, None
+    padded_dates = np.full((len(dates), width), np.datetime64('NaT'), dtype='datetime64[D]')
+    for row, when in enumerate(dates):
+        padded_dates[row, :len(when)] = np.asarray(when, dtype='datetime64[D]')
+    return padded_amounts, padded_dates
+
+
+# --- Solver ---
+def irr_from_times(times, amounts, tol=1e-10, max_iter=100):
+    """Annual rate (%) that zeroes the NPV of each row of cash flows.
+
+    `times` are in years from any common origin per row and `amounts` are
+    signed cash flows (investments negative, redemptions positive); both are
+    (portfolios, flows) arrays or broadcastable to it, with padding carried as
+    zero amounts. Solves in x = ln(1 + rate) with a Newton step guarded by a
+    bisection bracket, all rows at once. Rows without a sign change in NPV
+    between -99% and +1000% return NaN.
+    """
+    amounts = np.atleast_2d(np.asarray(amounts, dtype=float))
+    times = np.broadcast_to(np.atleast_2d(np.asarray(times, dtype=float)), amounts.shape)
+    present = amounts != 0
+    origin = np.where(present, times, np.inf).min(axis=-1, keepdims=True)
+    times = np.where(present, times - np.where(np.isfinite(origin), origin, 0.0), 0.0)
+
+    def npv(x, rows=slice(None)):
+        discount = np.exp(-x[:, None] * times[rows])
+        value = (amounts[rows] * discount).sum(axis=-1)
+        slope = -(amounts[rows] * times[rows] * discount).sum(axis=-1)
+        return value, slope
+
+    n = amounts.shape[0]
+    low = np.full(n, np.log(0.01))
+    high = np.full(n, np.log(11.0))
+    f_low, _ = npv(low)
+    f_high, _ = npv(high)
+    solvable = np.sign(f_low) * np.sign(f_high) <= 0
+
+    # Start from 10% a year; the last two steps start as the whole bracket
+    x = np.full(n, np.log(1.1))
+    last_step = high - low
+    older_step = last_step.copy()
+    active = np.flatnonzero(solvable)
+    for _ in range(max_iter):
+        if not active.size:
+            break
+        xa, lo, hi, fl = x[active], low[active], high[active], f_low[active]
+        f, slope = npv(xa, active)
+
+        # Keep the root bracketed: replace whichever end has f's sign
+        same_as_low = np.sign(f) == np.sign(fl)
+        lo = np.where(same_as_low, xa, lo)
+        hi = np.where(same_as_low, hi, xa)
+
+        # Bisect when Newton leaves the bracket or is not at least halving the
+        # step from two iterations back, as on the flat exponential tail of the NPV
+        with np.errstate(divide='ignore', invalid='ignore'):
+            newton = xa - f / slope
+        use_newton = (np.isfinite(newton) & (newton > lo) & (newton < hi)
+                      & (np.abs(2 * f) <= np.abs(older_step[active] * slope)))
+        step = np.where(use_newton, newton, (lo + hi) / 2)
+
+        low[active], high[active] = lo, hi
+        f_low[active] = np.where(same_as_low, f, fl)
+        older_step[active], last_step[active] = last_step[active], step - xa
+        x[active] = step
+
+        # Converged rows stop iterating, which also keeps them from being
+        # nudged off the root by a noisy bisection step
+        active = active[np.abs(step - xa) >= tol]
+
+    return np.where(solvable, np.expm1(x) * 100, np.nan)
+
+
+def xirr_batch(dates, amounts, tol=1e-10, max_iter=100):
+    """XIRR (%) for many portfolios of dated cash flows at once.
+
+    `dates` and `amounts` are (portfolios, flows) arrays, e.g. from
+    pad_cash_flows, or ragged sequences which are padded here. Year
+    fractions use an actual/365 day count, as spreadsheet XIRR does.
+    """
+    if not isinstance(amounts, np.ndarray) or not isinstance(dates, np.ndarray):
+        amounts, dates = pad_cash_flows(amounts, dates)
+    dates = np.asarray(dates, dtype='datetime64[D]')
+    days = np.where(np.isnat(dates), 0, dates.astype('int64'))
+    return irr_from_times(days / 365.0, amounts, tol, max_iter)
+
+
+def xirr(dates, amounts, tol=1e-10):
+    """XIRR (%) of a single series of dated cash flows"""
+    return float(xirr_batch([dates], [amounts], tol)[0])